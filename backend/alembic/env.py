@@ -22,7 +22,7 @@ if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
 # Import all models here for autogenerate to work
-# from app.models import user, dataset, image, annotation
+import app.models  # noqa: F401
 
 target_metadata = Base.metadata
 
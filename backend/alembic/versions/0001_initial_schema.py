@@ -0,0 +1,187 @@
+"""Initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Enum types are created once up front, since annotationtype is shared by two tables
+user_role = postgresql.ENUM('USER', 'ADMIN', name='userrole', create_type=False)
+job_status = postgresql.ENUM('PENDING', 'RUNNING', 'COMPLETED', 'FAILED', name='jobstatus', create_type=False)
+image_status = postgresql.ENUM('PENDING', 'READY', 'FAILED', name='imagestatus', create_type=False)
+annotation_type = postgresql.ENUM('BBOX', 'POLYGON', 'POINT', name='annotationtype', create_type=False)
+ENUMS = (user_role, job_status, image_status, annotation_type)
+
+
+def timestamps():
+    return [
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+    ]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    for enum in ENUMS:
+        enum.create(bind, checkfirst=True)
+
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('hashed_password', sa.String(), nullable=False),
+        sa.Column('full_name', sa.String(), nullable=True),
+        sa.Column('role', user_role, nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        *timestamps(),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_users_id', 'users', ['id'])
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+
+    op.create_table(
+        'datasets',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('image_count', sa.Integer(), nullable=False),
+        sa.Column('annotation_count', sa.Integer(), nullable=False),
+        *timestamps(),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_datasets_id', 'datasets', ['id'])
+    op.create_index('ix_datasets_name', 'datasets', ['name'])
+    op.create_index('ix_datasets_user_id_id', 'datasets', ['user_id', 'id'])
+
+    op.create_table(
+        'ingest_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('dataset_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('status', job_status, nullable=False),
+        sa.Column('total_count', sa.Integer(), nullable=False),
+        sa.Column('processed_count', sa.Integer(), nullable=False),
+        sa.Column('failed_count', sa.Integer(), nullable=False),
+        sa.Column('error', sa.String(), nullable=True),
+        *timestamps(),
+        sa.ForeignKeyConstraint(['dataset_id'], ['datasets.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_ingest_jobs_id', 'ingest_jobs', ['id'])
+    op.create_index('ix_ingest_jobs_dataset_id', 'ingest_jobs', ['dataset_id'])
+    op.create_index('ix_ingest_jobs_user_id', 'ingest_jobs', ['user_id'])
+
+    op.create_table(
+        'stored_objects',
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('s3_key', sa.String(), nullable=False),
+        sa.Column('thumbnail_key', sa.String(), nullable=True),
+        sa.Column('content_type', sa.String(), nullable=True),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('width', sa.Integer(), nullable=True),
+        sa.Column('height', sa.Integer(), nullable=True),
+        sa.Column('tile_prefix', sa.String(), nullable=True),
+        sa.Column('tile_size', sa.Integer(), nullable=True),
+        sa.Column('ref_count', sa.Integer(), nullable=False),
+        *timestamps(),
+        sa.PrimaryKeyConstraint('content_hash'),
+    )
+
+    op.create_table(
+        'images',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('filename', sa.String(), nullable=False),
+        sa.Column('dataset_id', sa.Integer(), nullable=False),
+        sa.Column('s3_key', sa.String(), nullable=False),
+        sa.Column('thumbnail_key', sa.String(), nullable=True),
+        sa.Column('width', sa.Integer(), nullable=True),
+        sa.Column('height', sa.Integer(), nullable=True),
+        sa.Column('content_hash', sa.String(length=64), nullable=True),
+        sa.Column('tile_prefix', sa.String(), nullable=True),
+        sa.Column('tile_size', sa.Integer(), nullable=True),
+        sa.Column('status', image_status, nullable=False),
+        sa.Column('error', sa.String(), nullable=True),
+        sa.Column('annotation_count', sa.Integer(), nullable=False),
+        sa.Column('ingest_job_id', sa.Integer(), nullable=True),
+        *timestamps(),
+        sa.ForeignKeyConstraint(['dataset_id'], ['datasets.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['ingest_job_id'], ['ingest_jobs.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_images_id', 'images', ['id'])
+    op.create_index('ix_images_content_hash', 'images', ['content_hash'])
+    op.create_index('ix_images_ingest_job_id', 'images', ['ingest_job_id'])
+    op.create_index('ix_images_dataset_id_id', 'images', ['dataset_id', 'id'])
+    op.create_index('ix_images_dataset_id_created_at', 'images', ['dataset_id', 'created_at'])
+    op.create_index('ix_images_dataset_id_width', 'images', ['dataset_id', 'width'])
+    op.create_index('ix_images_dataset_id_height', 'images', ['dataset_id', 'height'])
+    op.create_index(
+        'ix_images_dataset_id_unannotated', 'images', ['dataset_id', 'id'],
+        postgresql_where=sa.text('annotation_count = 0')
+    )
+
+    op.create_table(
+        'annotations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('image_id', sa.Integer(), nullable=False),
+        sa.Column('label', sa.String(), nullable=False),
+        sa.Column('annotation_type', annotation_type, nullable=False),
+        sa.Column('geometry', sa.JSON(), nullable=False),
+        sa.Column('created_by', sa.Integer(), nullable=True),
+        *timestamps(),
+        sa.ForeignKeyConstraint(['image_id'], ['images.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['created_by'], ['users.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_annotations_id', 'annotations', ['id'])
+    op.create_index('ix_annotations_label', 'annotations', ['label'])
+    op.create_index('ix_annotations_created_by', 'annotations', ['created_by'])
+    op.create_index('ix_annotations_image_id_label', 'annotations', ['image_id', 'label'])
+
+    op.create_table(
+        'dataset_label_counts',
+        sa.Column('dataset_id', sa.Integer(), nullable=False),
+        sa.Column('label', sa.String(), nullable=False),
+        sa.Column('annotation_type', annotation_type, nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['dataset_id'], ['datasets.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('dataset_id', 'label', 'annotation_type'),
+    )
+
+    op.create_table(
+        'dataset_histogram_buckets',
+        sa.Column('dataset_id', sa.Integer(), nullable=False),
+        sa.Column('annotation_count', sa.Integer(), nullable=False),
+        sa.Column('image_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['dataset_id'], ['datasets.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('dataset_id', 'annotation_count'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('dataset_histogram_buckets')
+    op.drop_table('dataset_label_counts')
+    op.drop_table('annotations')
+    op.drop_table('images')
+    op.drop_table('stored_objects')
+    op.drop_table('ingest_jobs')
+    op.drop_table('datasets')
+    op.drop_table('users')
+
+    bind = op.get_bind()
+    for enum in reversed(ENUMS):
+        enum.drop(bind, checkfirst=True)
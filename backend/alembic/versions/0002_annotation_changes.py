@@ -0,0 +1,50 @@
+"""Annotation change log
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+change_operation = postgresql.ENUM('CREATE', 'UPDATE', 'DELETE', name='changeoperation', create_type=False)
+
+
+def upgrade() -> None:
+    op.add_column(
+        'datasets',
+        sa.Column('revision', sa.BigInteger(), nullable=False, server_default='0')
+    )
+    op.alter_column('datasets', 'revision', server_default=None)
+
+    change_operation.create(op.get_bind(), checkfirst=True)
+    op.create_table(
+        'annotation_changes',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('dataset_id', sa.Integer(), nullable=False),
+        sa.Column('revision', sa.BigInteger(), nullable=False),
+        sa.Column('annotation_id', sa.Integer(), nullable=False),
+        sa.Column('image_id', sa.Integer(), nullable=False),
+        sa.Column('operation', change_operation, nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['dataset_id'], ['datasets.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_annotation_changes_dataset_id_revision', 'annotation_changes', ['dataset_id', 'revision'], unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('annotation_changes')
+    change_operation.drop(op.get_bind(), checkfirst=True)
+    op.drop_column('datasets', 'revision')
@@ -0,0 +1,113 @@
+"""Packed annotation geometry
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+import logging
+
+from alembic import op
+import numpy as np
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+# Frozen copies of the settings at the time of this migration
+PRECISION = 2
+INLINE_POINTS = 64
+PACKED_DTYPE = np.dtype('<f4')
+BATCH_SIZE = 1000
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+annotations = sa.table(
+    'annotations',
+    sa.column('id', sa.Integer()),
+    sa.column('annotation_type', sa.String()),
+    sa.column('geometry', sa.JSON()),
+    sa.column('coordinates', postgresql.JSONB()),
+    sa.column('coordinates_blob', sa.LargeBinary()),
+)
+
+
+def pack(annotation_id, annotation_type, geometry):
+    # The baseline stored any JSON object, so malformed legacy geometry is left empty
+    try:
+        if annotation_type == 'BBOX':
+            values = [geometry.get(field, 0) for field in ('x', 'y', 'width', 'height')]
+        elif annotation_type == 'POINT':
+            values = [geometry.get(field, 0) for field in ('x', 'y')]
+        else:
+            values = [value for point in geometry.get('points', []) for value in point[:2]]
+        values = np.round(np.asarray(values, dtype=np.float64), PRECISION)
+        if values.ndim != 1:
+            raise ValueError('nested coordinates')
+    except (AttributeError, TypeError, ValueError) as e:
+        logger.warning('Annotation %s: dropping invalid geometry %r (%s)', annotation_id, geometry, e)
+        return None, None
+
+    if annotation_type == 'POLYGON' and len(values) > 2 * INLINE_POINTS:
+        return None, values.astype(PACKED_DTYPE).tobytes()
+    return values.tolist(), None
+
+
+def unpack(annotation_id, annotation_type, coordinates, blob):
+    if blob is not None:
+        values = np.round(np.frombuffer(blob, dtype=PACKED_DTYPE).astype(np.float64), PRECISION).tolist()
+    else:
+        values = coordinates or []
+
+    if annotation_type == 'BBOX':
+        return dict(zip(('x', 'y', 'width', 'height'), values))
+    if annotation_type == 'POINT':
+        return dict(zip(('x', 'y'), values))
+    return {'points': [values[i:i + 2] for i in range(0, len(values) - 1, 2)]}
+
+
+def convert(source, target, transform) -> None:
+    """Rewrite every annotation's geometry, one keyset batch of rows per UPDATE executemany."""
+    bind = op.get_bind()
+    statement = annotations.update().where(annotations.c.id == sa.bindparam('_id')).values(
+        {name: sa.bindparam(name) for name in target}
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(annotations.c.id, annotations.c.annotation_type, *source)
+            .where(annotations.c.id > last_id)
+            .order_by(annotations.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+
+        bind.execute(statement, [{'_id': row[0], **dict(zip(target, transform(*row)))} for row in rows])
+        last_id = rows[-1][0]
+
+
+def upgrade() -> None:
+    op.add_column('annotations', sa.Column('coordinates', postgresql.JSONB(), nullable=True))
+    op.add_column('annotations', sa.Column('coordinates_blob', sa.LargeBinary(), nullable=True))
+    convert([annotations.c.geometry], ('coordinates', 'coordinates_blob'), pack)
+    op.drop_column('annotations', 'geometry')
+
+
+def downgrade() -> None:
+    op.add_column('annotations', sa.Column('geometry', sa.JSON(), nullable=True))
+    convert(
+        [annotations.c.coordinates, annotations.c.coordinates_blob],
+        ('geometry',),
+        lambda annotation_id, annotation_type, coordinates, blob: (
+            unpack(annotation_id, annotation_type, coordinates, blob),
+        )
+    )
+    op.alter_column('annotations', 'geometry', nullable=False)
+    op.drop_column('annotations', 'coordinates_blob')
+    op.drop_column('annotations', 'coordinates')
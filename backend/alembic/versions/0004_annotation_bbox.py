@@ -0,0 +1,88 @@
+"""Annotation bounding boxes and spatial index
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import numpy as np
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+PACKED_DTYPE = np.dtype('<f4')
+BATCH_SIZE = 1000
+BOUNDS = ('min_x', 'min_y', 'max_x', 'max_y')
+
+annotations = sa.table(
+    'annotations',
+    sa.column('id', sa.Integer()),
+    sa.column('annotation_type', sa.String()),
+    sa.column('coordinates', postgresql.JSONB()),
+    sa.column('coordinates_blob', sa.LargeBinary()),
+    *(sa.column(name, sa.Float()) for name in BOUNDS),
+)
+
+
+def extent(annotation_type, coordinates, blob):
+    if blob is not None:
+        values = np.frombuffer(blob, dtype=PACKED_DTYPE).astype(np.float64)
+    else:
+        values = np.asarray(coordinates or [], dtype=np.float64)
+
+    # Legacy rows can hold fewer values than their shape needs; those get a zero box
+    if len(values) < (4 if annotation_type == 'BBOX' else 2):
+        return [0.0, 0.0, 0.0, 0.0]
+    if annotation_type == 'BBOX':
+        x, y, width, height = values[:4]
+        return [x, y, round(x + width, 2), round(y + height, 2)]
+    points = values[:len(values) // 2 * 2].reshape(-1, 2)
+    return np.round(np.concatenate([points.min(axis=0), points.max(axis=0)]), 2).tolist()
+
+
+def upgrade() -> None:
+    for name in BOUNDS:
+        op.add_column('annotations', sa.Column(name, sa.Float(), nullable=True))
+
+    bind = op.get_bind()
+    statement = annotations.update().where(annotations.c.id == sa.bindparam('_id')).values(
+        {name: sa.bindparam(name) for name in BOUNDS}
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(
+                annotations.c.id, annotations.c.annotation_type,
+                annotations.c.coordinates, annotations.c.coordinates_blob
+            )
+            .where(annotations.c.id > last_id)
+            .order_by(annotations.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+
+        bind.execute(
+            statement, [{'_id': row[0], **dict(zip(BOUNDS, map(float, extent(*row[1:]))))} for row in rows]
+        )
+        last_id = rows[-1][0]
+
+    for name in BOUNDS:
+        op.alter_column('annotations', name, nullable=False)
+    op.execute(
+        'CREATE INDEX ix_annotations_bbox ON annotations '
+        'USING gist (box(point(min_x, min_y), point(max_x, max_y)))'
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_annotations_bbox', table_name='annotations')
+    for name in reversed(BOUNDS):
+        op.drop_column('annotations', name)
@@ -0,0 +1,51 @@
+"""Export jobs
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+export_format = postgresql.ENUM('COCO', name='exportformat', create_type=False)
+job_status = postgresql.ENUM('PENDING', 'RUNNING', 'COMPLETED', 'FAILED', name='jobstatus', create_type=False)
+
+
+def upgrade() -> None:
+    export_format.create(op.get_bind(), checkfirst=True)
+    op.create_table(
+        'export_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('dataset_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('format', export_format, nullable=False),
+        sa.Column('status', job_status, nullable=False),
+        sa.Column('image_count', sa.Integer(), nullable=False),
+        sa.Column('annotation_count', sa.Integer(), nullable=False),
+        sa.Column('result_key', sa.String(), nullable=True),
+        sa.Column('size', sa.BigInteger(), nullable=True),
+        sa.Column('rows_per_second', sa.Float(), nullable=True),
+        sa.Column('error', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['dataset_id'], ['datasets.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_export_jobs_id', 'export_jobs', ['id'])
+    op.create_index('ix_export_jobs_dataset_id', 'export_jobs', ['dataset_id'])
+    op.create_index('ix_export_jobs_user_id', 'export_jobs', ['user_id'])
+
+
+def downgrade() -> None:
+    op.drop_table('export_jobs')
+    export_format.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,33 @@
+"""YOLO and Pascal VOC export formats
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # ALTER TYPE ... ADD VALUE cannot run inside a transaction block before Postgres 12
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE exportformat ADD VALUE IF NOT EXISTS 'YOLO'")
+        op.execute("ALTER TYPE exportformat ADD VALUE IF NOT EXISTS 'VOC'")
+
+
+def downgrade() -> None:
+    # Enum values cannot be dropped, so the type is rebuilt without them
+    op.execute("DELETE FROM export_jobs WHERE format IN ('YOLO', 'VOC')")
+    op.execute("ALTER TYPE exportformat RENAME TO exportformat_old")
+    op.execute("CREATE TYPE exportformat AS ENUM ('COCO')")
+    op.execute(
+        "ALTER TABLE export_jobs ALTER COLUMN format TYPE exportformat USING format::text::exportformat"
+    )
+    op.execute("DROP TYPE exportformat_old")
@@ -1,17 +1,51 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, insert, update
 from sqlalchemy.orm import Session
 
+from app.core.database import SessionLocal
 from app.core.deps import get_db, get_current_user
 from app.models.user import User
 from app.models.dataset import Dataset
 from app.models.image import Image
-from app.models.annotation import Annotation
-from app.schemas.annotation import AnnotationCreate, AnnotationUpdate, AnnotationResponse
+from app.models.annotation import Annotation, AnnotationType
+from app.models.annotation_change import ChangeOperation
+from app.models.export_job import ExportFormat
+from app.schemas.annotation import (
+    AnnotationCreate,
+    AnnotationUpdate,
+    AnnotationResponse,
+    BulkAnnotationSave,
+    ImageAnnotations,
+    AnnotationOverlap
+)
+from app.schemas.pagination import Page
+from app.services.counters import add_annotations, relabel_annotations
+from app.services.cache import get_response_cache
+from app.services.changes import record_changes
+from app.services.geometry import encode_geometry, encode_geometries, GeometryError
+from app.services.export import iter_image_annotations, ndjson_line, chunked, use_snapshot
+from app.services.pagination import encode_cursor, decode_cursor, InvalidCursorError
+from app.services.spatial import BOX_COLUMNS, intersects, find_overlaps, iter_image_boxes
+from app.tasks.export import EXPORT_FORMATS, export_chunks
 
 router = APIRouter()
 
 
+def packed_geometry(annotation_type: AnnotationType, geometry: dict, image: Image) -> dict:
+    """Validate, clip and pack a geometry for an image, rejecting invalid shapes with a 422."""
+    try:
+        return encode_geometry(annotation_type, geometry, image.width, image.height)
+    except GeometryError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+
+
 @router.get("/images/{image_id}/annotations", response_model=List[AnnotationResponse])
 def list_annotations(
     image_id: int,
@@ -31,8 +65,248 @@ def list_annotations(
             detail="Image not found"
         )
 
-    annotations = db.query(Annotation).filter(Annotation.image_id == image_id).all()
-    return annotations
+    content = get_response_cache().get_or_build(
+        "annotations", image.dataset_id, current_user.id, {"image_id": image_id},
+        lambda: db.query(Annotation).filter(Annotation.image_id == image_id).all(),
+        List[AnnotationResponse]
+    )
+    return Response(content, media_type="application/json")
+
+
+def get_user_image(db: Session, image_id: int, user: User) -> Image:
+    """Fetch an image owned by the user or raise 404."""
+    image = db.query(Image).join(Dataset).filter(
+        Image.id == image_id,
+        Dataset.user_id == user.id
+    ).first()
+
+    if not image:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Image not found"
+        )
+    return image
+
+
+@router.get("/images/{image_id}/annotations/region", response_model=List[AnnotationResponse])
+def query_region(
+    image_id: int,
+    x: float = Query(..., ge=0),
+    y: float = Query(..., ge=0),
+    width: float = Query(0, ge=0),
+    height: float = Query(0, ge=0),
+    label: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    List the annotations of an image whose bounding box intersects a rectangle.
+
+    A zero width and height turn the rectangle into a point, for hit-testing
+    on the canvas. Matches come from the GiST index on the bounding box
+    columns, so dense images are not scanned.
+    """
+    get_user_image(db, image_id, current_user)
+
+    query = db.query(Annotation).filter(
+        Annotation.image_id == image_id,
+        intersects(x, y, x + width, y + height)
+    )
+    if label is not None:
+        query = query.filter(Annotation.label == label)
+
+    return query.order_by(Annotation.id).all()
+
+
+@router.get("/images/{image_id}/annotations/overlaps", response_model=List[AnnotationOverlap])
+def image_overlaps(
+    image_id: int,
+    min_iou: float = Query(0.5, gt=0, le=1),
+    same_label: bool = True,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Find duplicate or overlapping annotations on an image.
+
+    Pairs whose bounding boxes have an IoU of at least `min_iou` are
+    returned, strongest first; by default only annotations sharing a label
+    are compared.
+    """
+    image = get_user_image(db, image_id, current_user)
+
+    def build():
+        rows = db.query(Annotation.id, Annotation.label, *BOX_COLUMNS).filter(
+            Annotation.image_id == image_id
+        ).all()
+        if not rows:
+            return []
+        pairs = find_overlaps(
+            [row[0] for row in rows], [row[1] for row in rows], [row[2:] for row in rows], min_iou, same_label
+        )
+        return [
+            {"image_id": image_id, "annotation_id": first, "other_id": second, "iou": iou}
+            for first, second, iou in pairs
+        ]
+
+    content = get_response_cache().get_or_build(
+        "overlaps", image.dataset_id, current_user.id,
+        {"image_id": image_id, "min_iou": min_iou, "same_label": same_label},
+        build,
+        List[AnnotationOverlap]
+    )
+    return Response(content, media_type="application/json")
+
+
+@router.get("/datasets/{dataset_id}/annotations/overlaps", response_model=Page[AnnotationOverlap])
+def dataset_overlaps(
+    dataset_id: int,
+    min_iou: float = Query(0.5, gt=0, le=1),
+    same_label: bool = True,
+    limit: int = Query(1000, ge=1, le=10000),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Find duplicate or overlapping annotations across a dataset, image by image.
+
+    Images are scanned in id order from a server-side cursor. A page ends
+    at the first image boundary after `limit` pairs, so one image's pairs
+    are never split; pass next_cursor back as `cursor` to continue.
+    """
+    dataset = db.query(Dataset).filter(
+        Dataset.id == dataset_id,
+        Dataset.user_id == current_user.id
+    ).first()
+
+    if not dataset:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Dataset not found"
+        )
+
+    try:
+        after_image_id = decode_cursor(cursor) if cursor else 0
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+    def build():
+        items = []
+        next_cursor = None
+        previous_image_id = after_image_id
+        for image_id, ids, labels, boxes in iter_image_boxes(db, dataset_id, after_image_id):
+            if len(items) >= limit:
+                next_cursor = encode_cursor(previous_image_id)
+                break
+            items.extend(
+                {"image_id": image_id, "annotation_id": first, "other_id": second, "iou": iou}
+                for first, second, iou in find_overlaps(ids, labels, boxes, min_iou, same_label)
+            )
+            previous_image_id = image_id
+        return {"items": items, "next_cursor": next_cursor}
+
+    content = get_response_cache().get_or_build(
+        "overlaps", dataset_id, current_user.id,
+        {"cursor": cursor, "limit": limit, "min_iou": min_iou, "same_label": same_label},
+        build,
+        Page[AnnotationOverlap]
+    )
+    return Response(content, media_type="application/json")
+
+
+@router.get("/datasets/{dataset_id}/export")
+def export_annotations(
+    dataset_id: int,
+    include_unannotated: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Stream every annotation of a dataset as NDJSON, one line per image.
+
+    Each line holds an image's id, filename, size and annotations. Rows are
+    read from a server-side cursor and written as they arrive, so memory use
+    is constant however large the dataset is.
+    """
+    dataset = db.query(Dataset).filter(
+        Dataset.id == dataset_id,
+        Dataset.user_id == current_user.id
+    ).first()
+
+    if not dataset:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Dataset not found"
+        )
+
+    def stream():
+        # A session of its own, since the request's session closes once the response starts
+        export_db = SessionLocal()
+        try:
+            yield from chunked(
+                ndjson_line(image, annotations)
+                for image, annotations in iter_image_annotations(export_db, dataset_id, include_unannotated)
+            )
+        finally:
+            export_db.close()
+
+    return StreamingResponse(
+        stream(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="dataset-{dataset_id}-annotations.ndjson"'}
+    )
+
+
+@router.get("/datasets/{dataset_id}/export/{export_format}")
+def stream_export(
+    dataset_id: int,
+    export_format: ExportFormat,
+    include_images: bool = True,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Stream a dataset export straight to the client.
+
+    COCO is sent as one JSON document; YOLO and Pascal VOC as a ZIP (ZIP64
+    when large) of per-image label files and, with `include_images`, the
+    original images. The archive is written while it is sent, so nothing
+    is staged on disk. For exports kept in object storage, start an export
+    job instead.
+    """
+    dataset = db.query(Dataset).filter(
+        Dataset.id == dataset_id,
+        Dataset.user_id == current_user.id
+    ).first()
+
+    if not dataset:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Dataset not found"
+        )
+
+    extension, content_type = EXPORT_FORMATS[export_format]
+
+    def stream():
+        # A session of its own, since the request's session closes once the response starts
+        export_db = SessionLocal()
+        try:
+            use_snapshot(export_db)
+            yield from export_chunks(export_db, dataset_id, export_format, Counter(), include_images)
+        finally:
+            export_db.close()
+
+    return StreamingResponse(
+        stream(),
+        media_type=content_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="dataset-{dataset_id}-{export_format.value}.{extension}"'
+        }
+    )
 
 
 @router.post("/annotations", response_model=AnnotationResponse, status_code=status.HTTP_201_CREATED)
@@ -58,16 +332,196 @@ def create_annotation(
         image_id=annotation_data.image_id,
         label=annotation_data.label,
         annotation_type=annotation_data.annotation_type,
-        geometry=annotation_data.geometry,
-        created_by=current_user.id
+        created_by=current_user.id,
+        **packed_geometry(annotation_data.annotation_type, annotation_data.geometry, image)
     )
     db.add(annotation)
+    db.flush()
+    add_annotations(db, image.dataset_id, [(image.id, annotation.label, annotation.annotation_type)])
+    record_changes(db, image.dataset_id, [(annotation.id, image.id, ChangeOperation.CREATE)])
     db.commit()
+    get_response_cache().invalidate(image.dataset_id)
     db.refresh(annotation)
 
     return annotation
 
 
+@router.post("/annotations/bulk", response_model=List[ImageAnnotations])
+def save_annotations(
+    request: BulkAnnotationSave,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Save the annotations of one or more images in a single transaction.
+
+    For each image, items with an id update that annotation and items
+    without one are created; deleted_ids are removed. With replace=true the
+    items are the image's full desired set and every other annotation is
+    deleted. Returns the resulting annotations of each image.
+    """
+    image_ids = {item.image_id for item in request.images}
+    if len(image_ids) != len(request.images):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Each image may appear only once"
+        )
+    for item in request.images:
+        ids = Counter(annotation.id for annotation in item.annotations if annotation.id is not None)
+        repeated = [annotation_id for annotation_id, count in ids.items() if count > 1]
+        if repeated:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Annotation {repeated[0]} appears more than once on image {item.image_id}"
+            )
+
+    # One authorization query for every image in the request
+    images = {
+        row.id: row
+        for row in db.query(Image.id, Image.dataset_id, Image.width, Image.height).join(Dataset).filter(
+            Image.id.in_(image_ids),
+            Dataset.user_id == current_user.id
+        ).all()
+    }
+    if len(images) != len(image_ids):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Image not found"
+        )
+    datasets = {image_id: image.dataset_id for image_id, image in images.items()}
+
+    # Validate, clip and pack every geometry in the request in one vectorized pass
+    try:
+        packed = iter(encode_geometries([
+            (annotation.annotation_type, annotation.geometry, images[item.image_id].width, images[item.image_id].height)
+            for item in request.images
+            for annotation in item.annotations
+        ]))
+    except GeometryError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+
+    existing = {
+        row.id: row
+        for row in db.query(
+            Annotation.id,
+            Annotation.image_id,
+            Annotation.label,
+            Annotation.annotation_type,
+            Annotation.coordinates,
+            Annotation.coordinates_blob
+        ).filter(Annotation.image_id.in_(image_ids)).all()
+    }
+
+    inserts = []
+    updates = []
+    deletes = []
+    created = defaultdict(list)
+    deleted = defaultdict(list)
+    relabeled = defaultdict(list)
+    changes = defaultdict(list)
+    now = datetime.utcnow()
+
+    for item in request.images:
+        dataset_id = datasets[item.image_id]
+        kept = set()
+
+        for annotation in item.annotations:
+            geometry = next(packed)
+            if annotation.id is None:
+                inserts.append({
+                    "image_id": item.image_id,
+                    "label": annotation.label,
+                    "annotation_type": annotation.annotation_type,
+                    "created_by": current_user.id,
+                    **geometry
+                })
+                created[dataset_id].append((item.image_id, annotation.label, annotation.annotation_type))
+                continue
+
+            current = existing.get(annotation.id)
+            if current is None or current.image_id != item.image_id:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Annotation {annotation.id} not found on image {item.image_id}"
+                )
+
+            kept.add(annotation.id)
+            new_values = (
+                annotation.label, annotation.annotation_type, geometry["coordinates"], geometry["coordinates_blob"]
+            )
+            if new_values == (
+                current.label, current.annotation_type, current.coordinates, current.coordinates_blob
+            ):
+                continue
+
+            updates.append({
+                "id": annotation.id,
+                "label": annotation.label,
+                "annotation_type": annotation.annotation_type,
+                "updated_at": now,
+                **geometry
+            })
+            relabeled[dataset_id].append(
+                ((current.label, current.annotation_type), (annotation.label, annotation.annotation_type))
+            )
+            changes[dataset_id].append((annotation.id, item.image_id, ChangeOperation.UPDATE))
+
+        removed = set(item.deleted_ids)
+        if item.replace:
+            removed.update(
+                annotation_id for annotation_id, row in existing.items()
+                if row.image_id == item.image_id and annotation_id not in kept
+            )
+
+        for annotation_id in removed:
+            current = existing.get(annotation_id)
+            if current is None or current.image_id != item.image_id or annotation_id in kept:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Annotation {annotation_id} not found on image {item.image_id}"
+                )
+            deletes.append(annotation_id)
+            deleted[dataset_id].append((item.image_id, current.label, current.annotation_type))
+            changes[dataset_id].append((annotation_id, item.image_id, ChangeOperation.DELETE))
+
+    if deletes:
+        db.execute(
+            delete(Annotation).where(Annotation.id.in_(deletes)).execution_options(synchronize_session=False)
+        )
+    if updates:
+        db.execute(update(Annotation), updates)
+    if inserts:
+        inserted_ids = db.scalars(
+            insert(Annotation).returning(Annotation.id, sort_by_parameter_order=True),
+            inserts
+        ).all()
+        for row, annotation_id in zip(inserts, inserted_ids):
+            changes[datasets[row["image_id"]]].append((annotation_id, row["image_id"], ChangeOperation.CREATE))
+
+    for dataset_id in set(datasets.values()):
+        add_annotations(db, dataset_id, created[dataset_id])
+        add_annotations(db, dataset_id, deleted[dataset_id], sign=-1)
+        relabel_annotations(db, dataset_id, relabeled[dataset_id])
+        record_changes(db, dataset_id, changes[dataset_id])
+
+    db.commit()
+    get_response_cache().invalidate(*datasets.values())
+
+    saved = defaultdict(list)
+    for annotation in db.query(Annotation).filter(
+        Annotation.image_id.in_(image_ids)
+    ).order_by(Annotation.id).all():
+        saved[annotation.image_id].append(annotation)
+
+    return [
+        {"image_id": item.image_id, "annotations": saved[item.image_id]}
+        for item in request.images
+    ]
+
+
 @router.get("/annotations/{annotation_id}", response_model=AnnotationResponse)
 def get_annotation(
     annotation_id: int,
@@ -108,12 +562,23 @@ def update_annotation(
             detail="Annotation not found"
         )
 
-    # Update fields
+    # Update only the fields that differ, so a no-op body leaves the dataset revision alone
+    previous = (annotation.label, annotation.annotation_type)
     update_data = annotation_data.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
+    if "geometry" in update_data:
+        update_data.update(packed_geometry(annotation.annotation_type, update_data.pop("geometry"), annotation.image))
+    changed = {field: value for field, value in update_data.items() if getattr(annotation, field) != value}
+    if not changed:
+        return annotation
+    for field, value in changed.items():
         setattr(annotation, field, value)
 
+    dataset_id = annotation.image.dataset_id
+    if "label" in changed:
+        relabel_annotations(db, dataset_id, [(previous, (annotation.label, annotation.annotation_type))])
+    record_changes(db, dataset_id, [(annotation.id, annotation.image_id, ChangeOperation.UPDATE)])
     db.commit()
+    get_response_cache().invalidate(dataset_id)
     db.refresh(annotation)
 
     return annotation
@@ -137,7 +602,13 @@ def delete_annotation(
             detail="Annotation not found"
         )
 
+    dataset_id = annotation.image.dataset_id
+    add_annotations(
+        db, dataset_id, [(annotation.image_id, annotation.label, annotation.annotation_type)], sign=-1
+    )
+    record_changes(db, dataset_id, [(annotation.id, annotation.image_id, ChangeOperation.DELETE)])
     db.delete(annotation)
     db.commit()
+    get_response_cache().invalidate(dataset_id)
 
     return None
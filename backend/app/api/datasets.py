@@ -1,5 +1,6 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from collections import Counter
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
@@ -7,36 +8,98 @@ from app.core.deps import get_db, get_current_user
 from app.models.user import User
 from app.models.dataset import Dataset
 from app.models.image import Image
+from app.models.dataset_stats import DatasetLabelCount, DatasetHistogramBucket
 from app.models.annotation import Annotation
+from app.models.annotation_change import AnnotationChange, ChangeOperation
+from app.models.export_job import ExportJob
 from app.schemas.dataset import DatasetCreate, DatasetUpdate, DatasetResponse, DatasetWithStats
+from app.schemas.pagination import Page
+from app.schemas.annotation import AnnotationResponse
+from app.schemas.annotation_change import AnnotationChangeResponse, AnnotationChanges
+from app.schemas.export_job import ExportJobCreate, ExportJobResponse
+from app.services.pagination import paginate, InvalidCursorError
+from app.services.cache import get_response_cache
+from app.services.content import release_objects, delete_files
+from app.services.export import export_prefix
+from app.tasks.export import export_dataset_task
 
 router = APIRouter()
 
 
-@router.get("/", response_model=List[DatasetWithStats])
+def get_user_dataset(db: Session, dataset_id: int, current_user: User) -> Dataset:
+    """Load a dataset owned by the current user, or raise 404."""
+    dataset = db.query(Dataset).filter(
+        Dataset.id == dataset_id,
+        Dataset.user_id == current_user.id
+    ).first()
+
+    if not dataset:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Dataset not found"
+        )
+
+    return dataset
+
+
+def build_dataset_stats(db: Session, dataset: Dataset) -> dict:
+    """Assemble a dataset's statistics."""
+    # Served from the incrementally maintained stats tables, never from annotations
+    label_counts = db.query(
+        DatasetLabelCount.label, DatasetLabelCount.annotation_type, DatasetLabelCount.count
+    ).filter(
+        DatasetLabelCount.dataset_id == dataset.id,
+        DatasetLabelCount.count > 0
+    ).all()
+
+    histogram = dict(
+        db.query(DatasetHistogramBucket.annotation_count, DatasetHistogramBucket.image_count).filter(
+            DatasetHistogramBucket.dataset_id == dataset.id,
+            DatasetHistogramBucket.image_count > 0
+        ).order_by(DatasetHistogramBucket.annotation_count).all()
+    )
+
+    label_distribution = Counter()
+    type_distribution = Counter()
+    for label, annotation_type, count in label_counts:
+        label_distribution[label] += count
+        type_distribution[annotation_type.value] += count
+
+    return {
+        "dataset_id": dataset.id,
+        "image_count": dataset.image_count,
+        "annotation_count": dataset.annotation_count,
+        "label_distribution": dict(label_distribution),
+        "type_distribution": dict(type_distribution),
+        "images_without_annotations": histogram.get(0, 0),
+        "annotations_per_image": histogram
+    }
+
+
+@router.get("/", response_model=Page[DatasetWithStats])
 def list_datasets(
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """List all datasets for the current user."""
-    datasets = db.query(Dataset).filter(Dataset.user_id == current_user.id).offset(skip).limit(limit).all()
+    """
+    List datasets for the current user, ordered by id.
 
-    # Add statistics to each dataset
-    result = []
-    for dataset in datasets:
-        image_count = db.query(func.count(Image.id)).filter(Image.dataset_id == dataset.id).scalar()
-        annotation_count = db.query(func.count(Annotation.id)).join(Image).filter(
-            Image.dataset_id == dataset.id
-        ).scalar()
+    Pass the returned next_cursor back as `cursor` to fetch the following
+    page; `skip` is still honoured when no cursor is given.
+    """
+    # Counts are denormalized onto the dataset row, so a page is one plain query
+    query = db.query(Dataset).filter(Dataset.user_id == current_user.id)
 
-        dataset_dict = DatasetResponse.from_orm(dataset).model_dump()
-        dataset_dict["image_count"] = image_count or 0
-        dataset_dict["annotation_count"] = annotation_count or 0
-        result.append(DatasetWithStats(**dataset_dict))
-
-    return result
+    try:
+        return paginate(query, Dataset.id, limit, cursor, skip)
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
 
 
 @router.post("/", response_model=DatasetResponse, status_code=status.HTTP_201_CREATED)
@@ -64,28 +127,12 @@ def get_dataset(
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific dataset."""
-    dataset = db.query(Dataset).filter(
-        Dataset.id == dataset_id,
-        Dataset.user_id == current_user.id
-    ).first()
-
-    if not dataset:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Dataset not found"
-        )
-
-    # Get statistics
-    image_count = db.query(func.count(Image.id)).filter(Image.dataset_id == dataset.id).scalar()
-    annotation_count = db.query(func.count(Annotation.id)).join(Image).filter(
-        Image.dataset_id == dataset.id
-    ).scalar()
-
-    dataset_dict = DatasetResponse.from_orm(dataset).model_dump()
-    dataset_dict["image_count"] = image_count or 0
-    dataset_dict["annotation_count"] = annotation_count or 0
-
-    return DatasetWithStats(**dataset_dict)
+    content = get_response_cache().get_or_build(
+        "dataset", dataset_id, current_user.id, {},
+        lambda: get_user_dataset(db, dataset_id, current_user),
+        DatasetWithStats
+    )
+    return Response(content, media_type="application/json")
 
 
 @router.put("/{dataset_id}", response_model=DatasetResponse)
@@ -113,6 +160,7 @@ def update_dataset(
         setattr(dataset, field, value)
 
     db.commit()
+    get_response_cache().invalidate(dataset.id)
     db.refresh(dataset)
     return dataset
 
@@ -135,11 +183,52 @@ def delete_dataset(
             detail="Dataset not found"
         )
 
+    # Release the stored objects referenced by the dataset's images
+    hash_counts = dict(
+        db.query(Image.content_hash, func.count(Image.id)).filter(
+            Image.dataset_id == dataset.id,
+            Image.content_hash.isnot(None)
+        ).group_by(Image.content_hash).all()
+    )
+    keys = release_objects(db, hash_counts)
+
     db.delete(dataset)
     db.commit()
+    get_response_cache().invalidate(dataset_id)
+
+    delete_files(keys + [export_prefix(dataset_id)])
     return None
 
 
+@router.post("/{dataset_id}/exports", response_model=ExportJobResponse, status_code=status.HTTP_202_ACCEPTED)
+def create_export(
+    dataset_id: int,
+    export_data: ExportJobCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Start exporting a dataset to object storage.
+
+    Poll the returned job at /api/exports/{id}; once it completes, the file
+    is available from /api/exports/{id}/download.
+    """
+    dataset = get_user_dataset(db, dataset_id, current_user)
+
+    job = ExportJob(
+        dataset_id=dataset.id,
+        user_id=current_user.id,
+        format=export_data.format
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    export_dataset_task.delay(job.id, export_data.include_images)
+
+    return job
+
+
 @router.get("/{dataset_id}/stats", response_model=dict)
 def get_dataset_stats(
     dataset_id: int,
@@ -147,34 +236,59 @@ def get_dataset_stats(
     current_user: User = Depends(get_current_user)
 ):
     """Get detailed statistics for a dataset."""
-    dataset = db.query(Dataset).filter(
-        Dataset.id == dataset_id,
-        Dataset.user_id == current_user.id
-    ).first()
+    content = get_response_cache().get_or_build(
+        "dataset_stats", dataset_id, current_user.id, {},
+        lambda: build_dataset_stats(db, get_user_dataset(db, dataset_id, current_user)),
+        dict
+    )
+    return Response(content, media_type="application/json")
 
-    if not dataset:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Dataset not found"
-        )
 
-    # Get statistics
-    image_count = db.query(func.count(Image.id)).filter(Image.dataset_id == dataset.id).scalar()
-    annotation_count = db.query(func.count(Annotation.id)).join(Image).filter(
-        Image.dataset_id == dataset.id
-    ).scalar()
+@router.get("/{dataset_id}/changes", response_model=AnnotationChanges)
+def list_dataset_changes(
+    dataset_id: int,
+    since: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=10000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    List the annotation changes of a dataset after revision `since`, oldest first.
 
-    # Get label distribution
-    label_distribution = db.query(
-        Annotation.label,
-        func.count(Annotation.id).label('count')
-    ).join(Image).filter(
-        Image.dataset_id == dataset.id
-    ).group_by(Annotation.label).all()
+    Creates and updates carry the annotation's current state, which may
+    already include later edits; applying changes in order always converges.
+    Keep calling with next_since until has_more is false.
+    """
+    dataset = get_user_dataset(db, dataset_id, current_user)
 
-    return {
-        "dataset_id": dataset.id,
-        "image_count": image_count or 0,
-        "annotation_count": annotation_count or 0,
-        "label_distribution": {label: count for label, count in label_distribution}
-    }
+    rows = db.query(AnnotationChange, Annotation).outerjoin(
+        Annotation, Annotation.id == AnnotationChange.annotation_id
+    ).filter(
+        AnnotationChange.dataset_id == dataset.id,
+        AnnotationChange.revision > since
+    ).order_by(AnnotationChange.revision).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    changes = [
+        AnnotationChangeResponse(
+            revision=change.revision,
+            annotation_id=change.annotation_id,
+            image_id=change.image_id,
+            operation=change.operation,
+            created_at=change.created_at,
+            annotation=(
+                AnnotationResponse.model_validate(annotation)
+                if annotation is not None and change.operation != ChangeOperation.DELETE else None
+            )
+        )
+        for change, annotation in rows
+    ]
+
+    return AnnotationChanges(
+        revision=dataset.revision,
+        changes=changes,
+        next_since=changes[-1].revision if changes else since,
+        has_more=has_more
+    )
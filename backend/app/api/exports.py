@@ -0,0 +1,63 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.core.deps import get_db, get_current_user
+from app.models.user import User
+from app.models.export_job import ExportJob
+from app.models.ingest_job import JobStatus
+from app.schemas.export_job import ExportJobResponse
+from app.services.storage import storage_service
+
+router = APIRouter()
+
+
+def get_user_export(db: Session, export_id: int, current_user: User) -> ExportJob:
+    """Load an export job started by the current user, or raise 404."""
+    job = db.query(ExportJob).filter(
+        ExportJob.id == export_id,
+        ExportJob.user_id == current_user.id
+    ).first()
+
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Export not found"
+        )
+
+    return job
+
+
+@router.get("/{export_id}", response_model=ExportJobResponse)
+def get_export(
+    export_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get the progress of an export job."""
+    return get_user_export(db, export_id, current_user)
+
+
+@router.get("/{export_id}/download")
+def download_export(
+    export_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get a presigned URL for downloading a finished export."""
+    job = get_user_export(db, export_id, current_user)
+
+    if job.status != JobStatus.COMPLETED:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Export is not finished"
+        )
+
+    url = storage_service.get_presigned_url(job.result_key)
+
+    if not url:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to generate download URL"
+        )
+
+    return {"url": url}
@@ -0,0 +1,50 @@
+import mimetypes
+import os
+from urllib.parse import quote
+from fastapi import APIRouter, HTTPException, Response, status
+from fastapi.responses import FileResponse
+
+from app.core.config import settings
+from app.services.storage import get_storage_service, LocalStorageService, verify_file_url
+
+router = APIRouter()
+
+
+@router.get("/{key:path}")
+def download_file(key: str, expires: int, signature: str):
+    """
+    Serve a file from local storage through a signed, expiring link.
+
+    With LOCAL_STORAGE_ACCEL_PREFIX set, the app only checks the link and
+    answers with an X-Accel-Redirect header, so nginx sends the file itself
+    (with sendfile) from an internal location aliasing LOCAL_STORAGE_PATH.
+    Otherwise the file is streamed by the app in chunks.
+    """
+    storage_service = get_storage_service()
+    if not isinstance(storage_service, LocalStorageService):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found"
+        )
+
+    if not verify_file_url(key, expires, signature):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid or expired link"
+        )
+
+    try:
+        path = storage_service.file_path(key)
+        stat_result = os.stat(path)
+    except (OSError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found"
+        )
+
+    if settings.LOCAL_STORAGE_ACCEL_PREFIX:
+        return Response(
+            media_type=mimetypes.guess_type(key)[0] or "application/octet-stream",
+            headers={"X-Accel-Redirect": f"{settings.LOCAL_STORAGE_ACCEL_PREFIX.rstrip('/')}/{quote(key)}"}
+        )
+    return FileResponse(path, stat_result=stat_result)
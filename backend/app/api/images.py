@@ -1,38 +1,157 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+import asyncio
+import math
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, status, UploadFile, File, Form
+from fastapi.responses import RedirectResponse, Response
+from celery import group
+from sqlalchemy import exists, insert
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.core.deps import get_db, get_current_user
 from app.models.user import User
 from app.models.dataset import Dataset
-from app.models.image import Image
-from app.schemas.image import ImageResponse, ImageWithAnnotations
-from app.services.storage import storage_service
-from app.services.image import (
-    generate_unique_key,
-    get_image_dimensions,
-    create_thumbnail,
-    validate_image
-)
-from sqlalchemy import func
+from app.models.image import Image, ImageStatus
+from app.models.ingest_job import IngestJob, JobStatus
+from app.models.stored_object import StoredObject
 from app.models.annotation import Annotation
+from app.models.annotation_change import ChangeOperation
+from app.schemas.image import ImageResponse, ImageWithAnnotations, ImageUrlsRequest, ImageUrls
+from app.schemas.ingest_job import IngestJobResponse
+from app.schemas.pagination import Page
+from app.services.storage import storage_service, UploadTooLargeError
+from app.services.content import (
+    hash_fileobj,
+    content_key,
+    file_extension,
+    acquire_objects,
+    lock_objects,
+    release_objects,
+    ObjectsReleasedError,
+    delete_files,
+    tile_key
+)
+from app.services.image import generate_unique_key, pyramid_levels
+from app.services.archive import archive_format
+from app.services.executors import run_io_bound
+from app.tasks.ingest import process_image_task
+from app.services.counters import add_images, remove_image
+from app.services.pagination import paginate, InvalidCursorError
+from app.services.cache import get_response_cache
+from app.services.changes import record_changes
+from app.tasks.archive import import_archive_task, DERIVED_FIELDS
 
 router = APIRouter()
 
 
-@router.post("/datasets/{dataset_id}/images", response_model=List[ImageResponse], status_code=status.HTTP_201_CREATED)
+def save_uploads(
+    db: Session,
+    dataset_id: int,
+    user_id: int,
+    uploads: List[Tuple[str, str]],
+    existing: Dict[str, StoredObject],
+    new_objects: Dict[str, dict]
+) -> List[ImageResponse]:
+    """
+    Create the images of an upload batch, and the job tracking them, in one transaction.
+
+    `uploads` holds the (filename, content hash) of every file in request
+    order. The images come back from a single INSERT ... RETURNING, and the
+    pending ones go to the ingestion workers as one group, once per object.
+    Raises ObjectsReleasedError, with nothing written, if any of the
+    `existing` objects was deleted since it was looked up. Blocking: call
+    it through run_io_bound.
+    """
+    # Lock the reused objects so no concurrent delete can drop their files now
+    locked = lock_objects(db, existing)
+    if len(locked) < len(existing):
+        db.rollback()
+        raise ObjectsReleasedError(set(existing) - set(locked))
+    existing = locked
+
+    rows = []
+    for filename, content_hash in uploads:
+        stored = existing.get(content_hash)
+        if stored is not None and stored.thumbnail_key:
+            # Duplicate of an already processed object: reuse it as is
+            rows.append({
+                "filename": filename,
+                "s3_key": stored.s3_key,
+                "content_hash": content_hash,
+                "status": ImageStatus.READY,
+                **{field: getattr(stored, field) for field in DERIVED_FIELDS}
+            })
+        else:
+            rows.append({
+                "filename": filename,
+                "s3_key": stored.s3_key if stored is not None else new_objects[content_hash]["s3_key"],
+                "content_hash": content_hash,
+                "status": ImageStatus.PENDING
+            })
+
+    processed = sum(row["status"] == ImageStatus.READY for row in rows)
+    job = IngestJob(
+        dataset_id=dataset_id,
+        user_id=user_id,
+        total_count=len(rows),
+        processed_count=processed,
+        failed_count=0,
+        status=JobStatus.COMPLETED if processed == len(rows) else JobStatus.PENDING
+    )
+    db.add(job)
+    db.flush()
+
+    objects = {}
+    for content_hash, count in Counter(content_hash for _, content_hash in uploads).items():
+        if content_hash in new_objects:
+            objects[content_hash] = {**new_objects[content_hash], "ref_count": count}
+        else:
+            stored = existing[content_hash]
+            objects[content_hash] = {"s3_key": stored.s3_key, "size": stored.size, "ref_count": count}
+    acquire_objects(db, objects)
+
+    images = db.scalars(
+        insert(Image).returning(Image, sort_by_parameter_order=True),
+        [{**row, "dataset_id": dataset_id, "ingest_job_id": job.id} for row in rows]
+    ).all()
+    add_images(db, dataset_id, len(images))
+    uploaded = [ImageResponse.model_validate(image) for image in images]
+    db.commit()
+    get_response_cache().invalidate(dataset_id)
+
+    # Hand thumbnailing and metadata extraction to the workers, once per object
+    pending = {}
+    for image in uploaded:
+        if image.status == ImageStatus.PENDING:
+            pending.setdefault(image.content_hash, image.id)
+    if pending:
+        group(process_image_task.s(image_id) for image_id in pending.values()).apply_async()
+
+    return uploaded
+
+
+@router.post("/datasets/{dataset_id}/images", response_model=List[ImageResponse], status_code=status.HTTP_202_ACCEPTED)
 async def upload_images(
     dataset_id: int,
     files: List[UploadFile] = File(...),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Upload one or more images to a dataset."""
+    """
+    Upload one or more images to a dataset.
+
+    Originals are stored and returned as pending images right away; thumbnails
+    and metadata are produced by the ingestion workers. Poll the returned
+    ingest_job_id for progress. Database work runs on the I/O pool, so the
+    event loop only ever waits on it.
+    """
     # Verify dataset exists and belongs to user
-    dataset = db.query(Dataset).filter(
+    dataset = await run_io_bound(db.query(Dataset).filter(
         Dataset.id == dataset_id,
         Dataset.user_id == current_user.id
-    ).first()
+    ).first)
 
     if not dataset:
         raise HTTPException(
@@ -40,69 +159,143 @@ async def upload_images(
             detail="Dataset not found"
         )
 
-    uploaded_images = []
+    semaphore = asyncio.Semaphore(settings.UPLOAD_CONCURRENCY)
 
-    for file in files:
-        # Read file data
-        file_data = await file.read()
+    async def hash_file(file: UploadFile) -> Tuple[str, int]:
+        async with semaphore:
+            content_hash, size = await run_io_bound(hash_fileobj, file.file)
 
-        # Validate image
-        if not validate_image(file_data):
+        if size > settings.MAX_UPLOAD_SIZE:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid image file: {file.filename}"
+                detail=f"File too large: {file.filename}"
+            )
+        return content_hash, size
+
+    # Hash every file first so duplicates never reach the decoder or storage
+    hashes = await asyncio.gather(*(hash_file(file) for file in files))
+
+    existing = {
+        stored.content_hash: stored
+        for stored in await run_io_bound(db.query(StoredObject).filter(
+            StoredObject.content_hash.in_({content_hash for content_hash, _ in hashes})
+        ).all)
+    }
+
+    async def store_file(file: UploadFile, key: str) -> None:
+        async with semaphore:
+            # Stream the original to storage in chunks on the I/O pool
+            try:
+                streamed = await run_io_bound(storage_service.upload_stream, file.file, key, file.content_type)
+            except UploadTooLargeError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"File too large: {file.filename}"
+                )
+
+            if streamed is None:
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=f"Failed to upload image: {file.filename}"
+                )
+
+    uploads = [(file.filename, content_hash) for file, (content_hash, _) in zip(files, hashes)]
+    new_objects: Dict[str, dict] = {}
+    released = set()
+    while True:
+        # One upload per distinct new content hash in the batch
+        to_store: Dict[str, UploadFile] = {}
+        for file, (content_hash, size) in zip(files, hashes):
+            if content_hash in existing or content_hash in new_objects:
+                continue
+            if content_hash in released:
+                # The released object's files may still be deleted after its
+                # transaction, so its content key cannot be reused right now
+                key = generate_unique_key(file.filename)
+            else:
+                key = content_key(content_hash, extension=file_extension(file.filename))
+            new_objects[content_hash] = {"s3_key": key, "content_type": file.content_type, "size": size}
+            to_store[content_hash] = file
+
+        # Content-addressed keys are idempotent, so a failed batch leaves nothing
+        # that a retry would not overwrite with the same bytes
+        await asyncio.gather(*(
+            store_file(file, new_objects[content_hash]["s3_key"]) for content_hash, file in to_store.items()
+        ))
+
+        try:
+            return await run_io_bound(
+                save_uploads, db, dataset_id, current_user.id, uploads, existing, new_objects
             )
+        except ObjectsReleasedError as e:
+            # Deleted while this batch was uploading: store those files again
+            released |= e.content_hashes
+            for content_hash in e.content_hashes:
+                del existing[content_hash]
 
-        # Generate unique keys
-        s3_key = generate_unique_key(file.filename, prefix="images")
-        thumbnail_key = generate_unique_key(file.filename, prefix="thumbnails")
 
-        # Get image dimensions
-        width, height = get_image_dimensions(file_data)
+@router.post("/datasets/{dataset_id}/archives", response_model=IngestJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def import_archive(
+    dataset_id: int,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Import a ZIP or TAR archive of images into a dataset.
 
-        # Create thumbnail
-        thumbnail_data = create_thumbnail(file_data)
-        if not thumbnail_data:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to create thumbnail for {file.filename}"
-            )
+    The archive is streamed to storage and imported by a background job,
+    together with any COCO or YOLO annotations it contains. Poll the
+    returned job for progress.
+    """
+    # Verify dataset exists and belongs to user
+    dataset = db.query(Dataset).filter(
+        Dataset.id == dataset_id,
+        Dataset.user_id == current_user.id
+    ).first()
 
-        # Upload original image
-        if not storage_service.upload_file(file_data, s3_key, file.content_type):
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to upload image: {file.filename}"
-            )
+    if not dataset:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Dataset not found"
+        )
 
-        # Upload thumbnail
-        if not storage_service.upload_file(thumbnail_data, thumbnail_key, "image/jpeg"):
-            # Cleanup: delete the original image
-            storage_service.delete_file(s3_key)
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to upload thumbnail for {file.filename}"
-            )
+    fmt = archive_format(file.filename)
+    if fmt is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported archive format: {file.filename}"
+        )
 
-        # Save image metadata to database
-        image = Image(
-            filename=file.filename,
-            dataset_id=dataset_id,
-            s3_key=s3_key,
-            thumbnail_key=thumbnail_key,
-            width=width,
-            height=height
+    archive_key = generate_unique_key(file.filename, prefix="archives")
+    try:
+        streamed = await run_io_bound(
+            storage_service.upload_stream,
+            file.file,
+            archive_key,
+            file.content_type or "application/octet-stream",
+            settings.MAX_ARCHIVE_SIZE
+        )
+    except UploadTooLargeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File too large: {file.filename}"
         )
-        db.add(image)
-        uploaded_images.append(image)
 
+    if streamed is None:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to upload archive: {file.filename}"
+        )
+
+    job = IngestJob(dataset_id=dataset_id, user_id=current_user.id, total_count=0)
+    db.add(job)
     db.commit()
+    db.refresh(job)
 
-    # Refresh all images
-    for image in uploaded_images:
-        db.refresh(image)
+    import_archive_task.delay(job.id, archive_key, fmt)
 
-    return uploaded_images
+    return job
 
 
 @router.get("/images/{image_id}", response_model=ImageWithAnnotations)
@@ -123,15 +316,7 @@ def get_image(
             detail="Image not found"
         )
 
-    # Get annotation count
-    annotation_count = db.query(func.count(Annotation.id)).filter(
-        Annotation.image_id == image.id
-    ).scalar()
-
-    image_dict = ImageResponse.from_orm(image).model_dump()
-    image_dict["annotation_count"] = annotation_count or 0
-
-    return ImageWithAnnotations(**image_dict)
+    return image
 
 
 @router.delete("/images/{image_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -152,14 +337,25 @@ def delete_image(
             detail="Image not found"
         )
 
-    # Delete from storage
-    storage_service.delete_file(image.s3_key)
-    if image.thumbnail_key:
-        storage_service.delete_file(image.thumbnail_key)
+    # Drop the reference to the shared object; files go once nothing uses them
+    if image.content_hash:
+        keys = release_objects(db, {image.content_hash: 1})
+    else:
+        keys = [key for key in (image.s3_key, image.thumbnail_key) if key]
 
     # Delete from database (cascades to annotations)
+    dataset_id = image.dataset_id
+    remove_image(db, image)
+    record_changes(db, dataset_id, [
+        (annotation_id, image.id, ChangeOperation.DELETE)
+        for annotation_id, in db.query(Annotation.id).filter(Annotation.image_id == image.id).order_by(Annotation.id)
+    ])
     db.delete(image)
     db.commit()
+    get_response_cache().invalidate(dataset_id)
+
+    # Delete from storage
+    delete_files(keys)
 
     return None
 
@@ -184,6 +380,12 @@ def get_image_url(
         )
 
     key = image.thumbnail_key if thumbnail else image.s3_key
+    if not key:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Thumbnail not available yet"
+        )
+
     url = storage_service.get_presigned_url(key)
 
     if not url:
@@ -195,38 +397,266 @@ def get_image_url(
     return {"url": url}
 
 
-@router.get("/datasets/{dataset_id}/images", response_model=List[ImageWithAnnotations])
-def list_dataset_images(
+def build_image_urls(rows, original: bool, thumbnail: bool) -> List[ImageUrls]:
+    """Sign (or reuse cached) download URLs for (id, s3_key, thumbnail_key) rows."""
+    return [
+        ImageUrls(
+            id=image_id,
+            url=storage_service.get_presigned_url(s3_key) if original else None,
+            thumbnail_url=storage_service.get_presigned_url(thumbnail_key) if thumbnail and thumbnail_key else None
+        )
+        for image_id, s3_key, thumbnail_key in rows
+    ]
+
+
+@router.post("/images/urls", response_model=List[ImageUrls])
+def get_image_urls(
+    request: ImageUrlsRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get download URLs for many images with a single authorization query."""
+    rows = db.query(Image.id, Image.s3_key, Image.thumbnail_key).join(Dataset).filter(
+        Image.id.in_(request.image_ids),
+        Dataset.user_id == current_user.id
+    ).all()
+
+    return build_image_urls(rows, request.original, request.thumbnail)
+
+
+@router.get("/datasets/{dataset_id}/images/urls", response_model=List[ImageUrls])
+def get_dataset_image_urls(
     dataset_id: int,
     skip: int = 0,
     limit: int = 100,
+    original: bool = False,
+    thumbnail: bool = True,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """List all images in a dataset."""
-    # Verify dataset exists and belongs to user
-    dataset = db.query(Dataset).filter(
-        Dataset.id == dataset_id,
+    """Get download URLs for a page of a dataset's images with a single query."""
+    rows = db.query(Image.id, Image.s3_key, Image.thumbnail_key).join(Dataset).filter(
+        Image.dataset_id == dataset_id,
+        Dataset.user_id == current_user.id
+    ).order_by(Image.id).offset(skip).limit(limit).all()
+
+    return build_image_urls(rows, original, thumbnail)
+
+
+@router.get("/datasets/{dataset_id}/images", response_model=Page[ImageWithAnnotations])
+def list_dataset_images(
+    dataset_id: int,
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    List a dataset's images, ordered by id.
+
+    Pass the returned next_cursor back as `cursor` to fetch the following
+    page; `skip` is still honoured when no cursor is given.
+    """
+    def build_page():
+        # Verify dataset exists and belongs to user
+        dataset = db.query(Dataset).filter(
+            Dataset.id == dataset_id,
+            Dataset.user_id == current_user.id
+        ).first()
+
+        if not dataset:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Dataset not found"
+            )
+
+        query = db.query(Image).filter(Image.dataset_id == dataset_id)
+
+        try:
+            return paginate(query, Image.id, limit, cursor, skip)
+        except InvalidCursorError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+
+    content = get_response_cache().get_or_build(
+        "dataset_images", dataset_id, current_user.id,
+        {"skip": skip, "limit": limit, "cursor": cursor},
+        build_page,
+        Page[ImageWithAnnotations]
+    )
+    return Response(content, media_type="application/json")
+
+
+@router.get("/datasets/{dataset_id}/images/search", response_model=Page[ImageWithAnnotations])
+def search_dataset_images(
+    dataset_id: int,
+    label: Optional[str] = None,
+    annotated: Optional[bool] = None,
+    image_status: Optional[ImageStatus] = Query(None, alias="status"),
+    min_width: Optional[int] = None,
+    max_width: Optional[int] = None,
+    min_height: Optional[int] = None,
+    max_height: Optional[int] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Find a dataset's images matching all of the given filters, ordered by id.
+
+    `label` matches images with at least one annotation of that label and
+    `annotated` filters on whether an image has any annotations at all.
+    Pages are fetched with the returned next_cursor, as in list_dataset_images.
+    """
+    params = {
+        "label": label,
+        "annotated": annotated,
+        "status": image_status,
+        "min_width": min_width,
+        "max_width": max_width,
+        "min_height": min_height,
+        "max_height": max_height,
+        "created_after": created_after,
+        "created_before": created_before,
+        "limit": limit,
+        "cursor": cursor
+    }
+
+    def build_page():
+        # Verify dataset exists and belongs to user
+        dataset = db.query(Dataset).filter(
+            Dataset.id == dataset_id,
+            Dataset.user_id == current_user.id
+        ).first()
+
+        if not dataset:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Dataset not found"
+            )
+
+        query = db.query(Image).filter(Image.dataset_id == dataset_id)
+
+        # Semi-join on (image_id, label), so images are never multiplied by their annotations
+        if label is not None:
+            query = query.filter(
+                exists().where(Annotation.image_id == Image.id, Annotation.label == label)
+            )
+
+        # The denormalized counter matches the partial index on unannotated images
+        if annotated is True:
+            query = query.filter(Image.annotation_count > 0)
+        elif annotated is False:
+            query = query.filter(Image.annotation_count == 0)
+
+        if image_status is not None:
+            query = query.filter(Image.status == image_status)
+        if min_width is not None:
+            query = query.filter(Image.width >= min_width)
+        if max_width is not None:
+            query = query.filter(Image.width <= max_width)
+        if min_height is not None:
+            query = query.filter(Image.height >= min_height)
+        if max_height is not None:
+            query = query.filter(Image.height <= max_height)
+        if created_after is not None:
+            query = query.filter(Image.created_at >= created_after)
+        if created_before is not None:
+            query = query.filter(Image.created_at < created_before)
+
+        try:
+            return paginate(query, Image.id, limit, cursor)
+        except InvalidCursorError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+
+    content = get_response_cache().get_or_build(
+        "dataset_image_search", dataset_id, current_user.id, params,
+        build_page,
+        Page[ImageWithAnnotations]
+    )
+    return Response(content, media_type="application/json")
+
+
+@router.get("/images/{image_id}/pyramid")
+def get_image_pyramid(
+    image_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Describe the tile pyramid of a large image (deep-zoom layout)."""
+    image = db.query(Image).join(Dataset).filter(
+        Image.id == image_id,
         Dataset.user_id == current_user.id
     ).first()
 
-    if not dataset:
+    if not image or not image.tile_prefix:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Dataset not found"
+            detail="Image pyramid not found"
         )
 
-    images = db.query(Image).filter(Image.dataset_id == dataset_id).offset(skip).limit(limit).all()
+    return {
+        "width": image.width,
+        "height": image.height,
+        "tile_size": image.tile_size,
+        "levels": pyramid_levels(image.width, image.height),
+        "format": "jpeg"
+    }
 
-    # Add annotation counts
-    result = []
-    for image in images:
-        annotation_count = db.query(func.count(Annotation.id)).filter(
-            Annotation.image_id == image.id
-        ).scalar()
 
-        image_dict = ImageResponse.from_orm(image).model_dump()
-        image_dict["annotation_count"] = annotation_count or 0
-        result.append(ImageWithAnnotations(**image_dict))
+@router.get("/images/{image_id}/tiles/{level}/{column}/{row}")
+def get_image_tile(
+    image_id: int,
+    level: int,
+    column: int,
+    row: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Redirect to one tile of a large image's pyramid."""
+    image = db.query(Image).join(Dataset).filter(
+        Image.id == image_id,
+        Dataset.user_id == current_user.id
+    ).first()
+
+    if not image or not image.tile_prefix:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Image pyramid not found"
+        )
+
+    # Level dimensions halve (rounding up) from the full-size top level
+    max_level = pyramid_levels(image.width, image.height) - 1
+    if not 0 <= level <= max_level:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Tile not found"
+        )
+
+    scale = 2 ** (max_level - level)
+    level_width = math.ceil(image.width / scale)
+    level_height = math.ceil(image.height / scale)
+    if not (0 <= column < math.ceil(level_width / image.tile_size)
+            and 0 <= row < math.ceil(level_height / image.tile_size)):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Tile not found"
+        )
+
+    url = storage_service.get_presigned_url(tile_key(image.tile_prefix, level, column, row))
+    if not url:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to generate download URL"
+        )
 
-    return result
+    return RedirectResponse(url)
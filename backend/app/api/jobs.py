@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.core.deps import get_db, get_current_user
+from app.models.user import User
+from app.models.ingest_job import IngestJob
+from app.schemas.ingest_job import IngestJobResponse
+
+router = APIRouter()
+
+
+@router.get("/{job_id}", response_model=IngestJobResponse)
+def get_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get the progress of an ingestion job."""
+    job = db.query(IngestJob).filter(
+        IngestJob.id == job_id,
+        IngestJob.user_id == current_user.id
+    ).first()
+
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+
+    return job
@@ -0,0 +1,28 @@
+"""
+Repair drift in the denormalized image and annotation counters.
+
+Usage:
+    python -m app.commands.reconcile_counters [--dataset-id ID]
+"""
+import argparse
+
+from app.core.database import SessionLocal
+from app.services.counters import reconcile_counters
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dataset-id", type=int, default=None, help="Only reconcile this dataset")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        fixed = reconcile_counters(db, args.dataset_id)
+    finally:
+        db.close()
+
+    print(f"Fixed {fixed['images']} image(s) and {fixed['datasets']} dataset(s)")
+
+
+if __name__ == "__main__":
+    main()
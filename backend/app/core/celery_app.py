@@ -0,0 +1,19 @@
+from celery import Celery
+from app.core.config import settings
+
+celery_app = Celery(
+    "simplrflow",
+    broker=settings.REDIS_URL,
+    backend=settings.REDIS_URL,
+    include=["app.tasks.ingest", "app.tasks.archive", "app.tasks.export"]
+)
+
+celery_app.conf.update(
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    task_acks_late=True,
+    worker_prefetch_multiplier=1,
+    task_always_eager=settings.CELERY_TASK_ALWAYS_EAGER,
+    task_eager_propagates=True,
+)
@@ -19,22 +19,63 @@ class Settings(BaseSettings):
     # Redis
     REDIS_URL: str = "redis://redis:6379/0"
 
+    # Response Cache
+    RESPONSE_CACHE_TTL: int = 300  # Seconds; writes invalidate entries sooner
+    RESPONSE_CACHE_SIZE: int = 2048  # Entries kept by the in-process fallback
+    RESPONSE_CACHE_TIMEOUT: float = 0.5  # Redis socket timeout; slower calls count as misses
+
+    # Background Tasks
+    CELERY_TASK_ALWAYS_EAGER: bool = False  # Run tasks inline (tests, no worker)
+
     # CORS
     CORS_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:5173"]
 
     # Object Storage
+    STORAGE_BACKEND: str = "s3"  # "s3" or "local"
+    LOCAL_STORAGE_PATH: str = "./storage"
+    LOCAL_STORAGE_URL: str = "http://localhost:8000"  # Public base URL for local file links
+    LOCAL_STORAGE_ACCEL_PREFIX: str = ""  # nginx internal location aliasing LOCAL_STORAGE_PATH; empty serves files from the app
     S3_ENDPOINT: str = "http://minio:9000"
     S3_ACCESS_KEY: str = "minioadmin"
     S3_SECRET_KEY: str = "minioadmin"
     S3_BUCKET: str = "simplrflow"
     S3_USE_SSL: bool = False
+    S3_MAX_POOL_CONNECTIONS: int = 64  # Keep above STORAGE_TRANSFER_CONCURRENCY + STORAGE_IO_WORKERS
+    S3_CONNECT_TIMEOUT: float = 5.0
+    S3_READ_TIMEOUT: float = 60.0
+    S3_MAX_ATTEMPTS: int = 5
+    S3_RETRY_MODE: str = "adaptive"  # "legacy", "standard" or "adaptive"
+    STORAGE_TRANSFER_CONCURRENCY: int = 32  # Parallel transfers in upload_many/download_many/delete_many
+    PRESIGNED_URL_CACHE_SIZE: int = 10000  # Signed URLs kept for reuse
+    S3_MULTIPART_CHUNK_SIZE: int = 8 * 1024 * 1024  # 8MB (S3 minimum part size is 5MB)
 
     # File Upload
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB
+    MAX_ARCHIVE_SIZE: int = 20 * 1024 * 1024 * 1024  # 20GB
+    MAX_ANNOTATION_FILE_SIZE: int = 512 * 1024 * 1024  # 512MB, COCO files inside archives
+    ARCHIVE_BATCH_SIZE: int = 32  # Archive members processed and committed together
     ALLOWED_IMAGE_TYPES: List[str] = ["image/jpeg", "image/png", "image/jpg"]
 
     # Image Processing
     THUMBNAIL_SIZE: tuple = (300, 300)
+    PYRAMID_MIN_DIMENSION: int = 4096  # Images with a larger side get a tile pyramid
+    TILE_SIZE: int = 256
+
+    # Annotation Geometry
+    GEOMETRY_PRECISION: int = 2  # Decimal places kept for pixel coordinates
+    GEOMETRY_INLINE_POINTS: int = 64  # Larger polygons are stored as packed float32
+    OVERLAP_BLOCK_SIZE: int = 1024  # Rows of the IoU matrix computed at a time
+
+    # Export
+    EXPORT_BATCH_SIZE: int = 1000  # Rows fetched per round trip from the server-side cursor
+    EXPORT_CHUNK_SIZE: int = 64 * 1024  # Bytes buffered before each write to the client
+    EXPORT_IMAGE_BATCH_SIZE: int = 32  # Images fetched and labelled together by the YOLO and VOC exporters
+    MAX_EXPORT_SIZE: int = 50 * 1024 * 1024 * 1024  # 50GB
+
+    # Upload Concurrency
+    UPLOAD_CONCURRENCY: int = 4  # Files processed in parallel per upload request
+    IMAGE_PROCESS_WORKERS: int = 2  # Processes for CPU-bound image work
+    STORAGE_IO_WORKERS: int = 16  # Threads for blocking object storage calls
 
     class Config:
         env_file = ".env"
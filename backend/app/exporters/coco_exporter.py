@@ -0,0 +1,132 @@
+from collections import Counter
+from typing import Dict, Iterator, List, Sequence
+import json
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.image import Image
+from app.models.annotation import Annotation, AnnotationType
+from app.services.export import dataset_labels
+from app.services.geometry import decode_coordinates, polygon_area
+
+
+def coco_annotations(rows: Sequence, category_ids: Dict[str, int]) -> List[dict]:
+    """
+    Convert a batch of annotation rows into COCO annotations.
+
+    Boxes and areas come from the stored bounding box columns as one array
+    per batch; polygons also carry their segmentation and shoelace area,
+    and points are written as a single keypoint.
+    """
+    boxes = np.array([(row.min_x, row.min_y, row.max_x, row.max_y) for row in rows], dtype=np.float64)
+    sizes = np.round(boxes[:, 2:] - boxes[:, :2], settings.GEOMETRY_PRECISION)
+    areas = np.round(np.prod(sizes, axis=1), settings.GEOMETRY_PRECISION)
+
+    annotations = []
+    for row, (x, y), (width, height), area in zip(rows, boxes[:, :2].tolist(), sizes.tolist(), areas.tolist()):
+        annotation = {
+            "id": row.id,
+            "image_id": row.image_id,
+            "category_id": category_ids[row.label],
+            "bbox": [x, y, width, height],
+            "area": area,
+            "segmentation": [],
+            "iscrowd": 0
+        }
+        if row.annotation_type == AnnotationType.POLYGON:
+            values = decode_coordinates(row.coordinates, row.coordinates_blob)
+            annotation["segmentation"] = [values]
+            annotation["area"] = round(polygon_area(values), settings.GEOMETRY_PRECISION)
+        elif row.annotation_type == AnnotationType.POINT:
+            annotation["keypoints"] = [x, y, 2]
+            annotation["num_keypoints"] = 1
+        annotations.append(annotation)
+    return annotations
+
+
+def _json_array(batches: Iterator[List[dict]]) -> Iterator[bytes]:
+    """The comma-separated elements of a JSON array, one encoded batch at a time."""
+    first = True
+    for batch in batches:
+        if not batch:
+            continue
+        yield (b"" if first else b",") + b",".join(
+            json.dumps(item, separators=(",", ":")).encode() for item in batch
+        )
+        first = False
+
+
+def iter_coco(db: Session, dataset_id: int, stats: Counter, batch_size: int = None) -> Iterator[bytes]:
+    """
+    Write a dataset as a COCO JSON document, piece by piece.
+
+    Images and annotations each come from their own server-side cursor,
+    fetched `batch_size` rows at a time and encoded as they arrive, so
+    memory stays bounded however many annotations the dataset holds.
+    Counts of exported images and annotations are added to `stats`.
+    """
+    if batch_size is None:
+        batch_size = settings.EXPORT_BATCH_SIZE
+
+    labels = dataset_labels(db, dataset_id)
+    category_ids = {label: category_id for category_id, label in enumerate(labels, 1)}
+    categories = [{"id": category_id, "name": label} for label, category_id in category_ids.items()]
+
+    yield b'{"info":' + json.dumps({"description": f"Dataset {dataset_id}"}).encode()
+    yield b',"categories":' + json.dumps(categories, separators=(",", ":")).encode()
+
+    def image_batches() -> Iterator[List[dict]]:
+        rows = db.execute(
+            select(Image.id, Image.filename, Image.width, Image.height, Image.created_at).where(
+                Image.dataset_id == dataset_id
+            ).order_by(Image.id).execution_options(yield_per=batch_size)
+        )
+        try:
+            for partition in rows.partitions():
+                stats["images"] += len(partition)
+                yield [
+                    {
+                        "id": row.id,
+                        "file_name": row.filename,
+                        "width": row.width,
+                        "height": row.height,
+                        "date_captured": row.created_at.isoformat()
+                    }
+                    for row in partition
+                ]
+        finally:
+            rows.close()
+
+    def annotation_batches() -> Iterator[List[dict]]:
+        # Unordered, so Postgres can stream the join without sorting a million rows
+        rows = db.execute(
+            select(
+                Annotation.id,
+                Annotation.image_id,
+                Annotation.label,
+                Annotation.annotation_type,
+                Annotation.coordinates,
+                Annotation.coordinates_blob,
+                Annotation.min_x,
+                Annotation.min_y,
+                Annotation.max_x,
+                Annotation.max_y
+            ).join(Image, Image.id == Annotation.image_id).where(
+                Image.dataset_id == dataset_id
+            ).execution_options(yield_per=batch_size)
+        )
+        try:
+            for partition in rows.partitions():
+                stats["annotations"] += len(partition)
+                yield coco_annotations(partition, category_ids)
+        finally:
+            rows.close()
+
+    yield b',"images":['
+    yield from _json_array(image_batches())
+    yield b'],"annotations":['
+    yield from _json_array(annotation_batches())
+    yield b"]}"
@@ -0,0 +1,74 @@
+from collections import Counter
+from typing import Iterator, List, Tuple
+from xml.etree import ElementTree
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.annotation import AnnotationType
+from app.services.export import iter_label_archive
+
+
+def _element(parent: ElementTree.Element, tag: str, text=None) -> ElementTree.Element:
+    element = ElementTree.SubElement(parent, tag)
+    if text is not None:
+        element.text = str(text)
+    return element
+
+
+def voc_annotation(image: dict, annotations: List[dict]) -> bytes:
+    """
+    Render an image's annotations as a Pascal VOC XML file.
+
+    VOC only knows boxes, so polygons are written as their bounding box and
+    points are left out. Box corners are rounded to whole pixels.
+    """
+    shapes = [
+        annotation for annotation in annotations
+        if annotation["annotation_type"] in (AnnotationType.BBOX, AnnotationType.POLYGON)
+    ]
+
+    corners = np.zeros((len(shapes), 4), dtype=np.float64)
+    for row, annotation in enumerate(shapes):
+        geometry = annotation["geometry"]
+        if annotation["annotation_type"] == AnnotationType.BBOX:
+            corners[row] = (geometry["x"], geometry["y"], geometry["x"] + geometry["width"], geometry["y"] + geometry["height"])
+        else:
+            points = np.asarray(geometry["points"], dtype=np.float64)
+            corners[row] = np.concatenate([points.min(axis=0), points.max(axis=0)])
+    corners = np.rint(corners).astype(int)
+
+    root = ElementTree.Element("annotation")
+    _element(root, "folder", "JPEGImages")
+    _element(root, "filename", image["archive_name"])
+    size = _element(root, "size")
+    _element(size, "width", image["width"])
+    _element(size, "height", image["height"])
+    _element(size, "depth", 3)
+    _element(root, "segmented", 0)
+
+    for annotation, (xmin, ymin, xmax, ymax) in zip(shapes, corners.tolist()):
+        element = _element(root, "object")
+        _element(element, "name", annotation["label"])
+        _element(element, "pose", "Unspecified")
+        _element(element, "truncated", 0)
+        _element(element, "difficult", 0)
+        box = _element(element, "bndbox")
+        _element(box, "xmin", xmin)
+        _element(box, "ymin", ymin)
+        _element(box, "xmax", xmax)
+        _element(box, "ymax", ymax)
+
+    return ElementTree.tostring(root, encoding="utf-8")
+
+
+def iter_voc(
+    db: Session,
+    dataset_id: int,
+    stats: Counter,
+    include_images: bool = True
+) -> Iterator[Tuple[str, bytes, bool]]:
+    """Entries of a Pascal VOC archive: Annotations/ with one XML file per image, and JPEGImages/."""
+    yield from iter_label_archive(
+        db, dataset_id, stats, voc_annotation, "JPEGImages", "Annotations", "xml", include_images
+    )
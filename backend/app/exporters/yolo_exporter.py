@@ -0,0 +1,66 @@
+from collections import Counter
+from functools import partial
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.annotation import AnnotationType
+from app.services.export import dataset_labels, iter_label_archive
+
+
+def yolo_labels(class_ids: Dict[str, int], image: dict, annotations: List[dict]) -> bytes:
+    """
+    Render an image's annotations as a YOLO label file.
+
+    Boxes become "class cx cy w h" lines and polygons segmentation lines
+    "class x1 y1 x2 y2 ...", all normalized to the image size. YOLO has no
+    point format, so points are left out.
+    """
+    scale = np.array([image["width"], image["height"]], dtype=np.float64)
+
+    boxes = [annotation for annotation in annotations if annotation["annotation_type"] == AnnotationType.BBOX]
+    lines = []
+    if boxes:
+        # x, y, width, height -> normalized centre and size, for every box at once
+        values = np.array(
+            [[box["geometry"][field] for field in ("x", "y", "width", "height")] for box in boxes],
+            dtype=np.float64
+        )
+        values[:, :2] += values[:, 2:] / 2
+        values = np.clip(values / np.tile(scale, 2), 0, 1)
+        lines.extend(
+            f"{class_ids[box['label']]} " + " ".join(f"{value:.6f}" for value in row)
+            for box, row in zip(boxes, values.tolist())
+        )
+
+    for annotation in annotations:
+        if annotation["annotation_type"] == AnnotationType.POLYGON:
+            points = np.clip(np.asarray(annotation["geometry"]["points"], dtype=np.float64) / scale, 0, 1)
+            lines.append(
+                f"{class_ids[annotation['label']]} " + " ".join(f"{value:.6f}" for value in points.ravel().tolist())
+            )
+
+    return "".join(f"{line}\n" for line in lines).encode()
+
+
+def iter_yolo(
+    db: Session,
+    dataset_id: int,
+    stats: Counter,
+    include_images: bool = True
+) -> Iterator[Tuple[str, bytes, bool]]:
+    """
+    Entries of a YOLO dataset archive.
+
+    classes.txt lists the labels in class id order, labels/ holds one label
+    file per image and images/ the originals, paired by file stem as the
+    archive importer expects.
+    """
+    labels = dataset_labels(db, dataset_id)
+    yield "classes.txt", "".join(f"{label}\n" for label in labels).encode(), True
+
+    class_ids = {label: class_id for class_id, label in enumerate(labels)}
+    yield from iter_label_archive(
+        db, dataset_id, stats, partial(yolo_labels, class_ids), "images", "labels", "txt", include_images
+    )
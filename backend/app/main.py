@@ -1,7 +1,15 @@
+import time
+
+# Measured from here so the startup metric covers importing the application
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.api import auth, datasets, images, annotations
+from app.api import auth, datasets, images, annotations, jobs, exports, files
+from app.services.executors import get_io_pool, shutdown_executors
+from app.services.storage import get_storage_service, startup_metrics
+from app.services.cache import get_response_cache
 
 app = FastAPI(
     title="SimplrFlow - Computer Vision Annotation Platform",
@@ -30,8 +38,34 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/health/startup")
+async def startup_timings():
+    return startup_metrics
+
+@app.get("/health/storage")
+async def storage_transfer_metrics():
+    return get_storage_service().transfer_metrics.snapshot()
+
+@app.get("/health/cache")
+async def response_cache_metrics():
+    return get_response_cache().metrics.snapshot()
+
+@app.on_event("startup")
+def startup():
+    # Build the storage and cache clients off the startup path; requests create them lazily if they get there first
+    get_io_pool().submit(get_storage_service)
+    get_io_pool().submit(get_response_cache)
+    startup_metrics["app_ready_seconds"] = time.perf_counter() - _import_started
+
+@app.on_event("shutdown")
+def shutdown():
+    shutdown_executors()
+
 # Include API routers
 app.include_router(auth.router, prefix="/api/auth", tags=["authentication"])
 app.include_router(datasets.router, prefix="/api/datasets", tags=["datasets"])
 app.include_router(images.router, prefix="/api/images", tags=["images"])
 app.include_router(annotations.router, prefix="/api/annotations", tags=["annotations"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["jobs"])
+app.include_router(exports.router, prefix="/api/exports", tags=["exports"])
+app.include_router(files.router, prefix="/api/files", tags=["files"])
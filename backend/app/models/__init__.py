@@ -1,7 +1,30 @@
 from app.models.base import Base
 from app.models.user import User, UserRole
 from app.models.dataset import Dataset
-from app.models.image import Image
+from app.models.image import Image, ImageStatus
 from app.models.annotation import Annotation, AnnotationType
+from app.models.ingest_job import IngestJob, JobStatus
+from app.models.stored_object import StoredObject
+from app.models.dataset_stats import DatasetLabelCount, DatasetHistogramBucket
+from app.models.annotation_change import AnnotationChange, ChangeOperation
+from app.models.export_job import ExportJob, ExportFormat
 
-__all__ = ["Base", "User", "UserRole", "Dataset", "Image", "Annotation", "AnnotationType"]
+__all__ = [
+    "Base",
+    "User",
+    "UserRole",
+    "Dataset",
+    "Image",
+    "ImageStatus",
+    "Annotation",
+    "AnnotationType",
+    "IngestJob",
+    "JobStatus",
+    "StoredObject",
+    "DatasetLabelCount",
+    "DatasetHistogramBucket",
+    "AnnotationChange",
+    "ChangeOperation",
+    "ExportJob",
+    "ExportFormat",
+]
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Enum, JSON
+from sqlalchemy import Column, Integer, Float, String, ForeignKey, Enum, Index, LargeBinary, func
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from app.models.base import Base, TimestampMixin
 import enum
@@ -17,12 +18,42 @@ class Annotation(Base, TimestampMixin):
     image_id = Column(Integer, ForeignKey("images.id", ondelete="CASCADE"), nullable=False)
     label = Column(String, nullable=False, index=True)
     annotation_type = Column(Enum(AnnotationType), nullable=False)
-    geometry = Column(JSON, nullable=False)  # Stores coordinates as JSON
-    created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    coordinates = Column(JSONB, nullable=True)  # Flat [x, y, ...] list, see services/geometry.py
+    coordinates_blob = Column(LargeBinary, nullable=True)  # Packed float32 pairs for large polygons
+    # Bounding box of the geometry, derived on write for spatial queries
+    min_x = Column(Float, nullable=False)
+    min_y = Column(Float, nullable=False)
+    max_x = Column(Float, nullable=False)
+    max_y = Column(Float, nullable=False)
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
 
     # Relationships
     image = relationship("Image", back_populates="annotations")
     user = relationship("User", backref="annotations")
 
+    __table_args__ = (
+        # Per-image listings and label filters; also serves lookups on image_id alone
+        Index("ix_annotations_image_id_label", "image_id", "label"),
+    )
+
+    @property
+    def geometry(self) -> dict:
+        """The geometry in its API form, decoded from the packed columns."""
+        # Imported here since the geometry service itself depends on this module
+        from app.services.geometry import decode_geometry
+        return decode_geometry(self.annotation_type, self.coordinates, self.coordinates_blob)
+
     def __repr__(self):
         return f"<Annotation(id={self.id}, label={self.label}, type={self.annotation_type})>"
+
+
+def bbox_expression():
+    """The annotation bounding box as a Postgres box, matching the GiST index below."""
+    return func.box(
+        func.point(Annotation.min_x, Annotation.min_y),
+        func.point(Annotation.max_x, Annotation.max_y)
+    )
+
+
+# Region queries test boxes for overlap (&&) against this index
+Index("ix_annotations_bbox", bbox_expression(), postgresql_using="gist")
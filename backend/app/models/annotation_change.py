@@ -0,0 +1,33 @@
+from sqlalchemy import Column, BigInteger, Integer, ForeignKey, Enum, DateTime, Index
+from app.models.base import Base
+from datetime import datetime
+import enum
+
+
+class ChangeOperation(str, enum.Enum):
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+
+
+class AnnotationChange(Base):
+    """Append-only log of annotation writes, numbered by the dataset's revision counter."""
+    __tablename__ = "annotation_changes"
+
+    id = Column(BigInteger, primary_key=True)
+    dataset_id = Column(Integer, ForeignKey("datasets.id", ondelete="CASCADE"), nullable=False)
+    revision = Column(BigInteger, nullable=False)
+    annotation_id = Column(Integer, nullable=False)  # No foreign key: deletes are logged too
+    image_id = Column(Integer, nullable=False)
+    operation = Column(Enum(ChangeOperation), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_annotation_changes_dataset_id_revision", "dataset_id", "revision", unique=True),
+    )
+
+    def __repr__(self):
+        return (
+            f"<AnnotationChange(dataset_id={self.dataset_id}, revision={self.revision}, "
+            f"annotation_id={self.annotation_id}, operation={self.operation})>"
+        )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Text
+from sqlalchemy import Column, BigInteger, Integer, String, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from app.models.base import Base, TimestampMixin
 
@@ -10,10 +10,20 @@ class Dataset(Base, TimestampMixin):
     name = Column(String, nullable=False, index=True)
     description = Column(Text, nullable=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    image_count = Column(Integer, default=0, nullable=False)  # Maintained on write, see services/counters.py
+    annotation_count = Column(Integer, default=0, nullable=False)
+    revision = Column(BigInteger, default=0, nullable=False)  # Last annotation change, see services/changes.py
 
     # Relationships
     user = relationship("User", backref="datasets")
     images = relationship("Image", back_populates="dataset", cascade="all, delete-orphan")
+    label_counts = relationship("DatasetLabelCount", cascade="all, delete-orphan", passive_deletes=True)
+    histogram_buckets = relationship("DatasetHistogramBucket", cascade="all, delete-orphan", passive_deletes=True)
+
+    __table_args__ = (
+        # Ownership checks and keyset pages of a user's datasets; also covers the foreign key
+        Index("ix_datasets_user_id_id", "user_id", "id"),
+    )
 
     def __repr__(self):
         return f"<Dataset(id={self.id}, name={self.name}, user_id={self.user_id})>"
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Enum
+from app.models.base import Base
+from app.models.annotation import AnnotationType
+
+
+class DatasetLabelCount(Base):
+    """Number of annotations per (label, type) in a dataset, maintained on write."""
+    __tablename__ = "dataset_label_counts"
+
+    dataset_id = Column(Integer, ForeignKey("datasets.id", ondelete="CASCADE"), primary_key=True)
+    label = Column(String, primary_key=True)
+    annotation_type = Column(Enum(AnnotationType), primary_key=True)
+    count = Column(Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<DatasetLabelCount(dataset_id={self.dataset_id}, label={self.label}, count={self.count})>"
+
+
+class DatasetHistogramBucket(Base):
+    """Number of images in a dataset having exactly `annotation_count` annotations, maintained on write."""
+    __tablename__ = "dataset_histogram_buckets"
+
+    dataset_id = Column(Integer, ForeignKey("datasets.id", ondelete="CASCADE"), primary_key=True)
+    annotation_count = Column(Integer, primary_key=True)
+    image_count = Column(Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return (
+            f"<DatasetHistogramBucket(dataset_id={self.dataset_id}, "
+            f"annotation_count={self.annotation_count}, image_count={self.image_count})>"
+        )
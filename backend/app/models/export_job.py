@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, BigInteger, Float, String, ForeignKey, Enum
+from sqlalchemy.orm import relationship
+from app.models.base import Base, TimestampMixin
+from app.models.ingest_job import JobStatus
+import enum
+
+
+class ExportFormat(str, enum.Enum):
+    COCO = "coco"
+    YOLO = "yolo"
+    VOC = "voc"
+
+
+class ExportJob(Base, TimestampMixin):
+    """A dataset export being written to object storage by the export workers."""
+    __tablename__ = "export_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    dataset_id = Column(Integer, ForeignKey("datasets.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    format = Column(Enum(ExportFormat), nullable=False)
+    status = Column(Enum(JobStatus), default=JobStatus.PENDING, nullable=False)
+    image_count = Column(Integer, default=0, nullable=False)
+    annotation_count = Column(Integer, default=0, nullable=False)
+    result_key = Column(String, nullable=True)  # Storage key of the finished export
+    size = Column(BigInteger, nullable=True)
+    rows_per_second = Column(Float, nullable=True)  # Throughput of the export, images and annotations combined
+    error = Column(String, nullable=True)  # Reason the export failed
+
+    # Relationships
+    dataset = relationship("Dataset")
+
+    def __repr__(self):
+        return f"<ExportJob(id={self.id}, dataset_id={self.dataset_id}, format={self.format}, status={self.status})>"
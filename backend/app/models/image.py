@@ -1,6 +1,13 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from app.models.base import Base, TimestampMixin
+import enum
+
+
+class ImageStatus(str, enum.Enum):
+    PENDING = "pending"
+    READY = "ready"
+    FAILED = "failed"
 
 
 class Image(Base, TimestampMixin):
@@ -13,10 +20,31 @@ class Image(Base, TimestampMixin):
     thumbnail_key = Column(String, nullable=True)  # Path to thumbnail in S3/MinIO
     width = Column(Integer, nullable=True)
     height = Column(Integer, nullable=True)
+    content_hash = Column(String(64), nullable=True, index=True)  # SHA-256, keys into stored_objects
+    tile_prefix = Column(String, nullable=True)  # Prefix of the tile pyramid for large images
+    tile_size = Column(Integer, nullable=True)
+    status = Column(Enum(ImageStatus), default=ImageStatus.PENDING, nullable=False)
+    error = Column(String, nullable=True)  # Reason ingestion failed
+    annotation_count = Column(Integer, default=0, nullable=False)  # Maintained on write, see services/counters.py
+    ingest_job_id = Column(Integer, ForeignKey("ingest_jobs.id", ondelete="SET NULL"), nullable=True, index=True)
 
     # Relationships
     dataset = relationship("Dataset", back_populates="images")
     annotations = relationship("Annotation", back_populates="image", cascade="all, delete-orphan")
+    ingest_job = relationship("IngestJob", back_populates="images")
+
+    __table_args__ = (
+        # Dataset listings and keyset pages: WHERE dataset_id = ? AND id > ? ORDER BY id
+        Index("ix_images_dataset_id_id", "dataset_id", "id"),
+        # Filters of the image query endpoint
+        Index("ix_images_dataset_id_created_at", "dataset_id", "created_at"),
+        Index("ix_images_dataset_id_width", "dataset_id", "width"),
+        Index("ix_images_dataset_id_height", "dataset_id", "height"),
+        Index(
+            "ix_images_dataset_id_unannotated", "dataset_id", "id",
+            postgresql_where=annotation_count == 0
+        ),
+    )
 
     def __repr__(self):
         return f"<Image(id={self.id}, filename={self.filename}, dataset_id={self.dataset_id})>"
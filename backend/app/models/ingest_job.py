@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Enum
+from sqlalchemy.orm import relationship
+from app.models.base import Base, TimestampMixin
+import enum
+
+
+class JobStatus(str, enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class IngestJob(Base, TimestampMixin):
+    """A batch of uploaded images being processed by the ingestion workers."""
+    __tablename__ = "ingest_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    dataset_id = Column(Integer, ForeignKey("datasets.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    status = Column(Enum(JobStatus), default=JobStatus.PENDING, nullable=False)
+    total_count = Column(Integer, default=0, nullable=False)
+    processed_count = Column(Integer, default=0, nullable=False)
+    failed_count = Column(Integer, default=0, nullable=False)
+    error = Column(String, nullable=True)  # Reason the whole job failed
+
+    # Relationships
+    dataset = relationship("Dataset")
+    images = relationship("Image", back_populates="ingest_job")
+
+    def __repr__(self):
+        return f"<IngestJob(id={self.id}, dataset_id={self.dataset_id}, status={self.status})>"
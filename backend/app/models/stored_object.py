@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String
+from app.models.base import Base, TimestampMixin
+
+
+class StoredObject(Base, TimestampMixin):
+    """An original image and its derivatives in object storage, shared by identical uploads."""
+    __tablename__ = "stored_objects"
+
+    content_hash = Column(String(64), primary_key=True)  # SHA-256 of the original bytes
+    s3_key = Column(String, nullable=False)
+    thumbnail_key = Column(String, nullable=True)
+    content_type = Column(String, nullable=True)
+    size = Column(Integer, nullable=False)
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    tile_prefix = Column(String, nullable=True)
+    tile_size = Column(Integer, nullable=True)
+    ref_count = Column(Integer, default=0, nullable=False)  # Images referencing this object
+
+    def __repr__(self):
+        return f"<StoredObject(content_hash={self.content_hash}, ref_count={self.ref_count})>"
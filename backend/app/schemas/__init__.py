@@ -1,7 +1,20 @@
 from app.schemas.user import UserCreate, UserUpdate, UserResponse, Token, TokenPayload
 from app.schemas.dataset import DatasetCreate, DatasetUpdate, DatasetResponse, DatasetWithStats
-from app.schemas.image import ImageCreate, ImageResponse, ImageWithAnnotations
-from app.schemas.annotation import AnnotationCreate, AnnotationUpdate, AnnotationResponse
+from app.schemas.image import ImageCreate, ImageResponse, ImageWithAnnotations, ImageUrlsRequest, ImageUrls
+from app.schemas.annotation import (
+    AnnotationCreate,
+    AnnotationUpdate,
+    AnnotationResponse,
+    AnnotationSaveItem,
+    ImageAnnotationsSave,
+    BulkAnnotationSave,
+    ImageAnnotations,
+    AnnotationOverlap
+)
+from app.schemas.ingest_job import IngestJobResponse
+from app.schemas.export_job import ExportJobCreate, ExportJobResponse
+from app.schemas.pagination import Page
+from app.schemas.annotation_change import AnnotationChangeResponse, AnnotationChanges
 
 __all__ = [
     "UserCreate",
@@ -16,7 +29,20 @@ __all__ = [
     "ImageCreate",
     "ImageResponse",
     "ImageWithAnnotations",
+    "ImageUrlsRequest",
+    "ImageUrls",
     "AnnotationCreate",
     "AnnotationUpdate",
     "AnnotationResponse",
+    "AnnotationSaveItem",
+    "ImageAnnotationsSave",
+    "BulkAnnotationSave",
+    "ImageAnnotations",
+    "AnnotationOverlap",
+    "IngestJobResponse",
+    "ExportJobCreate",
+    "ExportJobResponse",
+    "Page",
+    "AnnotationChangeResponse",
+    "AnnotationChanges",
 ]
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 from app.models.annotation import AnnotationType
 
@@ -28,3 +28,30 @@ class AnnotationResponse(AnnotationBase):
 
     class Config:
         from_attributes = True
+
+
+class AnnotationSaveItem(AnnotationBase):
+    id: Optional[int] = None  # Existing annotation to update; omit to create
+
+
+class ImageAnnotationsSave(BaseModel):
+    image_id: int
+    annotations: List[AnnotationSaveItem] = Field(default_factory=list, max_length=10000)
+    deleted_ids: List[int] = Field(default_factory=list, max_length=10000)
+    replace: bool = Field(False, description="Treat annotations as the full desired set and delete the rest")
+
+
+class BulkAnnotationSave(BaseModel):
+    images: List[ImageAnnotationsSave] = Field(..., min_length=1, max_length=100)
+
+
+class ImageAnnotations(BaseModel):
+    image_id: int
+    annotations: List[AnnotationResponse]
+
+
+class AnnotationOverlap(BaseModel):
+    image_id: int
+    annotation_id: int
+    other_id: int
+    iou: float = Field(..., description="Intersection over union of the two bounding boxes")
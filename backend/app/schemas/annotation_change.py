@@ -0,0 +1,24 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+from app.models.annotation_change import ChangeOperation
+from app.schemas.annotation import AnnotationResponse
+
+
+class AnnotationChangeResponse(BaseModel):
+    revision: int
+    annotation_id: int
+    image_id: int
+    operation: ChangeOperation
+    created_at: datetime
+    annotation: Optional[AnnotationResponse] = None  # Current state; None once deleted
+
+    class Config:
+        from_attributes = True
+
+
+class AnnotationChanges(BaseModel):
+    revision: int  # The dataset's latest revision
+    changes: List[AnnotationChangeResponse]
+    next_since: int  # Pass back as `since` to continue
+    has_more: bool
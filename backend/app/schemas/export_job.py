@@ -0,0 +1,27 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+from app.models.export_job import ExportFormat
+from app.models.ingest_job import JobStatus
+
+
+class ExportJobCreate(BaseModel):
+    format: ExportFormat = ExportFormat.COCO
+    include_images: bool = True  # Bundle the original images (YOLO and VOC only)
+
+
+class ExportJobResponse(BaseModel):
+    id: int
+    dataset_id: int
+    format: ExportFormat
+    status: JobStatus
+    image_count: int
+    annotation_count: int
+    size: Optional[int] = None
+    rows_per_second: Optional[float] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -1,6 +1,7 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import datetime
+from app.models.image import ImageStatus
 
 
 class ImageBase(BaseModel):
@@ -22,6 +23,11 @@ class ImageResponse(ImageBase):
     thumbnail_key: Optional[str] = None
     width: Optional[int] = None
     height: Optional[int] = None
+    content_hash: Optional[str] = None
+    tile_size: Optional[int] = None
+    status: ImageStatus
+    error: Optional[str] = None
+    ingest_job_id: Optional[int] = None
     created_at: datetime
     updated_at: datetime
 
@@ -31,3 +37,15 @@ class ImageResponse(ImageBase):
 
 class ImageWithAnnotations(ImageResponse):
     annotation_count: int = 0
+
+
+class ImageUrlsRequest(BaseModel):
+    image_ids: List[int] = Field(..., max_length=1000)
+    original: bool = False
+    thumbnail: bool = True
+
+
+class ImageUrls(BaseModel):
+    id: int
+    url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
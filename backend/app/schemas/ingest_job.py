@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+from app.models.ingest_job import JobStatus
+
+
+class IngestJobResponse(BaseModel):
+    id: int
+    dataset_id: int
+    status: JobStatus
+    total_count: int
+    processed_count: int
+    failed_count: int
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
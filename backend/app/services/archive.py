@@ -0,0 +1,228 @@
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+import json
+import math
+import posixpath
+import tarfile
+import zipfile
+
+from app.models.annotation import AnnotationType
+
+
+IMAGE_EXTENSIONS = {"jpg", "jpeg", "png", "bmp", "gif", "tif", "tiff", "webp"}
+ARCHIVE_FORMATS = {
+    ".zip": "zip",
+    ".tar": "tar",
+    ".tar.gz": "tar",
+    ".tgz": "tar",
+    ".tar.bz2": "tar",
+    ".tar.xz": "tar",
+}
+YOLO_CLASS_FILES = {"classes.txt", "obj.names"}
+
+T = TypeVar("T")
+
+
+def archive_format(filename: str) -> Optional[str]:
+    """Archive format ("zip" or "tar") implied by a filename, or None if unsupported."""
+    name = filename.lower()
+    for suffix, fmt in ARCHIVE_FORMATS.items():
+        if name.endswith(suffix):
+            return fmt
+    return None
+
+
+def member_extension(name: str) -> str:
+    """Lower-cased extension of an archive member."""
+    return posixpath.splitext(name)[1].lstrip(".").lower()
+
+
+def member_path(name: str) -> str:
+    """Normalized path of an archive member relative to the archive root."""
+    return posixpath.normpath(name.lstrip("/"))
+
+
+def member_stem(name: str) -> str:
+    """Path of an archive member without its extension, used to pair images and labels."""
+    return posixpath.splitext(member_path(name))[0]
+
+
+def in_labels_directory(name: str) -> bool:
+    """Whether a member sits under a labels/ directory, as in the YOLO dataset layout."""
+    return "labels" in member_path(name).split("/")[:-1]
+
+
+def is_yolo_labels(text: str) -> bool:
+    """Whether a text file starts like YOLO labels: a class id and at least 4 coordinates per line."""
+    for line in text.splitlines():
+        values = line.split()
+        if not values:
+            continue
+        try:
+            return len(values) >= 5 and all(math.isfinite(float(value)) for value in values)
+        except ValueError:
+            return False
+    return False
+
+
+def yolo_image_stems(name: str) -> List[str]:
+    """
+    Stems of the images a YOLO label file may belong to, most likely first.
+
+    A label sits next to its image, or under a labels/ directory mirroring
+    an images/ one (labels/train/a.txt for images/train/a.jpg).
+    """
+    stem = member_stem(name)
+    parts = stem.split("/")
+    stems = [stem]
+    for i in range(len(parts) - 2, -1, -1):
+        if parts[i] == "labels":
+            stems.append("/".join(parts[:i] + ["images"] + parts[i + 1:]))
+            break
+    return stems
+
+
+def index_by_basename(paths: Iterable[str]) -> Dict[str, List[str]]:
+    """Member paths grouped by their last component, for resolve_member."""
+    index: Dict[str, List[str]] = {}
+    for path in paths:
+        index.setdefault(posixpath.basename(path), []).append(path)
+    return index
+
+
+def resolve_member(
+    paths: List[str],
+    suffix: str,
+    members: Dict[str, T],
+    by_basename: Dict[str, List[str]]
+) -> Optional[T]:
+    """
+    Find the member referenced from another file of the archive.
+
+    The first of `paths` present in `members` wins. Otherwise the reference
+    resolves to the only member whose path ends with `suffix`, and to None
+    when several do, so files with the same name in different directories
+    are never mixed up.
+    """
+    for path in paths:
+        if path in members:
+            return members[path]
+
+    matches = [
+        path for path in by_basename.get(posixpath.basename(suffix), [])
+        if path == suffix or path.endswith("/" + suffix)
+    ]
+    return members[matches[0]] if len(matches) == 1 else None
+
+
+def iter_archive(fileobj: BinaryIO, fmt: str) -> Iterator[Tuple[str, int, Callable[[], bytes]]]:
+    """
+    Iterate the regular files in a ZIP or TAR archive without extracting them to disk.
+
+    Yields (name, size, read) where read() returns the member's bytes. TAR
+    archives are read as a forward-only stream, so read() must be called
+    before advancing to the next member. ZIP archives need a seekable file.
+    """
+    if fmt == "zip":
+        with zipfile.ZipFile(fileobj) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                yield info.filename, info.file_size, lambda info=info: archive.read(info)
+    else:
+        with tarfile.open(fileobj=fileobj, mode="r|*") as archive:
+            for member in archive:
+                if not member.isfile():
+                    continue
+                yield member.name, member.size, lambda member=member: archive.extractfile(member).read()
+
+
+def parse_coco(data: bytes) -> Dict[str, List[dict]]:
+    """
+    Parse a COCO annotation file into annotations keyed by image file_name.
+
+    Polygon segmentations become polygon annotations; everything else is
+    imported from its bbox.
+    """
+    coco = json.loads(data)
+    if not isinstance(coco, dict) or "images" not in coco or "annotations" not in coco:
+        return {}
+
+    categories = {category["id"]: category["name"] for category in coco.get("categories", [])}
+    filenames = {image["id"]: posixpath.normpath(image["file_name"]) for image in coco["images"]}
+
+    annotations: Dict[str, List[dict]] = {}
+    for annotation in coco["annotations"]:
+        filename = filenames.get(annotation.get("image_id"))
+        if filename is None:
+            continue
+
+        label = categories.get(annotation.get("category_id"), str(annotation.get("category_id")))
+        segmentation = annotation.get("segmentation")
+
+        if isinstance(segmentation, list) and segmentation and len(segmentation[0]) >= 6:
+            ring = segmentation[0]
+            geometry = {"points": [[ring[i], ring[i + 1]] for i in range(0, len(ring) - 1, 2)]}
+            annotation_type = AnnotationType.POLYGON
+        elif annotation.get("bbox"):
+            x, y, width, height = annotation["bbox"]
+            geometry = {"x": x, "y": y, "width": width, "height": height}
+            annotation_type = AnnotationType.BBOX
+        else:
+            continue
+
+        annotations.setdefault(filename, []).append({
+            "label": label,
+            "annotation_type": annotation_type,
+            "geometry": geometry
+        })
+
+    return annotations
+
+
+def parse_yolo_classes(data: bytes) -> List[str]:
+    """Parse a YOLO class names file (one name per line). Raises UnicodeDecodeError unless UTF-8."""
+    return [line.strip() for line in data.decode("utf-8").splitlines() if line.strip()]
+
+
+def parse_yolo_labels(text: str, class_names: List[str], width: int, height: int) -> List[dict]:
+    """
+    Parse a YOLO label file into annotations in pixel coordinates.
+
+    Lines are "class cx cy w h" for boxes, or "class x1 y1 x2 y2 ..." for
+    segmentation polygons, all normalized to the image size.
+    """
+    annotations = []
+    for line in text.splitlines():
+        values = line.split()
+        if len(values) < 5:
+            continue
+
+        try:
+            class_id = int(float(values[0]))
+            coords = [float(value) for value in values[1:]]
+        except (ValueError, OverflowError):
+            # Not a number, or a class id of inf
+            continue
+
+        label = class_names[class_id] if 0 <= class_id < len(class_names) else str(class_id)
+
+        if len(coords) == 4:
+            cx, cy, w, h = coords
+            geometry = {
+                "x": (cx - w / 2) * width,
+                "y": (cy - h / 2) * height,
+                "width": w * width,
+                "height": h * height
+            }
+            annotation_type = AnnotationType.BBOX
+        else:
+            geometry = {"points": [[coords[i] * width, coords[i + 1] * height] for i in range(0, len(coords) - 1, 2)]}
+            annotation_type = AnnotationType.POLYGON
+
+        annotations.append({
+            "label": label,
+            "annotation_type": annotation_type,
+            "geometry": geometry
+        })
+
+    return annotations
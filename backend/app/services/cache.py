@@ -0,0 +1,233 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+import hashlib
+import json
+import threading
+import time
+
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+
+
+class CacheBackend(ABC):
+    """Key-value store behind the response cache."""
+
+    name = "backend"
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        pass
+
+    @abstractmethod
+    def incr(self, key: str) -> int:
+        """Atomically increment an integer key and return the new value."""
+        pass
+
+
+class RedisCacheBackend(CacheBackend):
+    """Cache shared by every API process and worker through Redis."""
+
+    name = "redis"
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        self.client.set(key, value, ex=ttl)
+
+    def incr(self, key: str) -> int:
+        return self.client.incr(key)
+
+
+class LRUCacheBackend(CacheBackend):
+    """
+    In-process LRU cache with per-entry expiry.
+
+    Used when Redis is not reachable. Entries and versions are local to the
+    process, so writes made by other processes are only seen once entries expire.
+    Counters are kept apart from the LRU, since evicting a version would
+    bring back the entries it superseded.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self.counters: Dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self.lock:
+            if key in self.counters:
+                return str(self.counters[key]).encode()
+
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+            if expires_at < time.time():
+                del self.entries[key]
+                return None
+
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        with self.lock:
+            self.entries[key] = (value, time.time() + ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def incr(self, key: str) -> int:
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + 1
+            return self.counters[key]
+
+
+class CacheMetrics:
+    """Hit/miss counters of the response cache."""
+
+    def __init__(self, backend: str):
+        self.backend = backend
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.invalidations = 0
+
+    def record(self, counter: str) -> None:
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": self.backend,
+                "hits": self.hits,
+                "misses": self.misses,
+                "errors": self.errors,
+                "invalidations": self.invalidations,
+                "hit_ratio": self.hits / lookups if lookups else 0.0
+            }
+
+
+class ResponseCache:
+    """
+    Cache of serialized API responses, invalidated through versioned keys.
+
+    Every entry belongs to a dataset and its key embeds that dataset's
+    current version number. A write bumps the version with one INCR, which
+    orphans every cached response for the dataset at once; orphaned entries
+    simply expire. Backend errors are counted and treated as misses, so the
+    cache can never fail a request.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: int = None):
+        self.backend = backend
+        self.ttl = ttl or settings.RESPONSE_CACHE_TTL
+        self.metrics = CacheMetrics(backend.name)
+
+    @staticmethod
+    def _version_key(dataset_id: int) -> str:
+        return f"cache:version:dataset:{dataset_id}"
+
+    def _entry_key(self, namespace: str, dataset_id: int, user_id: int, params: Dict[str, Any]) -> str:
+        version = self.backend.get(self._version_key(dataset_id))
+        digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+        return f"cache:{namespace}:{dataset_id}:v{int(version or 0)}:{user_id}:{digest}"
+
+    def get_or_build(
+        self,
+        namespace: str,
+        dataset_id: int,
+        user_id: int,
+        params: Dict[str, Any],
+        build: Callable[[], Any],
+        response_model: Any
+    ) -> bytes:
+        """
+        Return the cached JSON for a response, or build, serialize and cache it.
+
+        `build` runs only on a miss; exceptions it raises (such as a 404)
+        propagate and nothing is cached. The result is validated against
+        `response_model`, as FastAPI would, before being serialized.
+        """
+        key = None
+        try:
+            key = self._entry_key(namespace, dataset_id, user_id, params)
+            cached = self.backend.get(key)
+        except Exception as e:
+            print(f"Response cache unavailable: {e}")
+            self.metrics.record("errors")
+            cached = None
+
+        if cached is not None:
+            self.metrics.record("hits")
+            return cached
+
+        self.metrics.record("misses")
+        adapter = TypeAdapter(response_model)
+        content = adapter.dump_json(adapter.validate_python(build(), from_attributes=True))
+
+        if key is not None:
+            try:
+                self.backend.set(key, content, self.ttl)
+            except Exception as e:
+                print(f"Response cache unavailable: {e}")
+                self.metrics.record("errors")
+
+        return content
+
+    def invalidate(self, *dataset_ids: int) -> None:
+        """Drop every cached response of the given datasets; call after the write commits."""
+        for dataset_id in set(dataset_ids):
+            try:
+                self.backend.incr(self._version_key(dataset_id))
+                self.metrics.record("invalidations")
+            except Exception as e:
+                print(f"Response cache unavailable: {e}")
+                self.metrics.record("errors")
+
+
+def create_response_cache() -> ResponseCache:
+    """Create the response cache on Redis, falling back to an in-process LRU if it is unreachable."""
+    try:
+        import redis
+
+        client = redis.Redis.from_url(
+            settings.REDIS_URL,
+            socket_connect_timeout=settings.RESPONSE_CACHE_TIMEOUT,
+            socket_timeout=settings.RESPONSE_CACHE_TIMEOUT
+        )
+        client.ping()
+        return ResponseCache(RedisCacheBackend(client))
+    except Exception as e:
+        print(f"Redis unavailable, using in-process response cache: {e}")
+        return ResponseCache(LRUCacheBackend(settings.RESPONSE_CACHE_SIZE))
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Get the response cache, connecting on first use."""
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = create_response_cache()
+    return _response_cache
@@ -0,0 +1,46 @@
+from typing import Iterable, List, Tuple
+
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+from app.models.dataset import Dataset
+from app.models.annotation_change import AnnotationChange, ChangeOperation
+
+
+def record_changes(
+    db: Session,
+    dataset_id: int,
+    changes: Iterable[Tuple[int, int, ChangeOperation]]
+) -> int:
+    """
+    Append annotation writes to the dataset's change log in the current transaction.
+
+    `changes` holds (annotation_id, image_id, operation) tuples. Each change
+    gets its own revision from the dataset's counter. The counter is bumped
+    with UPDATE ... RETURNING, so its row lock orders concurrent writers and
+    revisions become visible in commit order. A client that has seen
+    revision N therefore never misses a later change with a lower revision.
+    Returns the dataset's new revision.
+    """
+    changes: List[Tuple[int, int, ChangeOperation]] = list(changes)
+    if not changes:
+        return 0
+
+    revision = db.execute(
+        update(Dataset).where(Dataset.id == dataset_id).values(
+            revision=Dataset.revision + len(changes)
+        ).returning(Dataset.revision)
+    ).scalar_one()
+
+    first = revision - len(changes) + 1
+    db.execute(insert(AnnotationChange), [
+        {
+            "dataset_id": dataset_id,
+            "revision": first + offset,
+            "annotation_id": annotation_id,
+            "image_id": image_id,
+            "operation": operation
+        }
+        for offset, (annotation_id, image_id, operation) in enumerate(changes)
+    ])
+    return revision
@@ -0,0 +1,121 @@
+from typing import BinaryIO, Dict, Iterable, List, Tuple
+import hashlib
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.stored_object import StoredObject
+from app.services.storage import storage_service
+
+
+class ObjectsReleasedError(Exception):
+    """Raised when stored objects found earlier were released before the batch could reference them."""
+
+    def __init__(self, content_hashes: Iterable[str]):
+        self.content_hashes = set(content_hashes)
+        super().__init__(f"Stored objects released concurrently: {', '.join(sorted(self.content_hashes))}")
+
+
+def hash_fileobj(fileobj: BinaryIO, chunk_size: int = None) -> Tuple[str, int]:
+    """Compute the SHA-256 and size of a file object, reading it in chunks."""
+    if chunk_size is None:
+        chunk_size = settings.S3_MULTIPART_CHUNK_SIZE
+
+    hasher = hashlib.sha256()
+    size = 0
+    fileobj.seek(0)
+    for chunk in iter(lambda: fileobj.read(chunk_size), b""):
+        hasher.update(chunk)
+        size += len(chunk)
+    fileobj.seek(0)
+    return hasher.hexdigest(), size
+
+
+def content_key(content_hash: str, prefix: str = "images", extension: str = "jpg") -> str:
+    """Storage key derived from content, so identical bytes always map to the same object."""
+    return f"{prefix}/{content_hash[:2]}/{content_hash}.{extension}"
+
+
+def tile_key(tile_prefix: str, level: int, column: int, row: int) -> str:
+    """Storage key of one pyramid tile."""
+    return f"{tile_prefix}/{level}/{column}_{row}.jpg"
+
+
+def file_extension(filename: str) -> str:
+    """Extension of an uploaded filename, defaulting to jpg."""
+    return filename.rsplit('.', 1)[-1].lower() if '.' in filename else 'jpg'
+
+
+def lock_objects(db: Session, content_hashes: Iterable[str]) -> Dict[str, StoredObject]:
+    """
+    Read stored objects with SELECT ... FOR UPDATE, keyed by content hash.
+
+    Until the transaction ends, release_objects waits on these rows, so an
+    object found here cannot be deleted before acquire_objects references
+    it. Objects already released are missing from the result. Rows are
+    locked in hash order, like acquire_objects, so batches never deadlock.
+    """
+    return {
+        stored.content_hash: stored
+        for stored in db.query(StoredObject).filter(
+            StoredObject.content_hash.in_(set(content_hashes))
+        ).order_by(StoredObject.content_hash).with_for_update().populate_existing().all()
+    }
+
+
+def acquire_objects(db: Session, objects: Dict[str, dict]) -> None:
+    """
+    Add references to stored objects, creating the rows that do not exist yet.
+
+    `objects` maps content hash to the column values for a new row plus a
+    `ref_count` holding the number of references to add. Uses an upsert so
+    concurrent uploads of the same bytes increment one shared row. Objects
+    reused from an earlier lookup must be re-read with lock_objects in the
+    same transaction first, or a concurrent release may delete them.
+    """
+    for content_hash, values in sorted(objects.items()):
+        statement = insert(StoredObject).values(content_hash=content_hash, **values)
+        statement = statement.on_conflict_do_update(
+            index_elements=[StoredObject.content_hash],
+            set_={"ref_count": StoredObject.ref_count + statement.excluded.ref_count}
+        )
+        db.execute(statement)
+
+
+def release_objects(db: Session, hash_counts: Dict[str, int]) -> List[str]:
+    """
+    Drop references to stored objects.
+
+    Rows whose count reaches zero are deleted, and their storage keys are
+    returned so the caller can remove them with delete_files once the
+    transaction commits. Rows are updated in hash order, like lock_objects
+    and acquire_objects take them, so a release never deadlocks with them.
+    """
+    keys = []
+    for content_hash, count in sorted(hash_counts.items()):
+        db.query(StoredObject).filter(StoredObject.content_hash == content_hash).update(
+            {StoredObject.ref_count: StoredObject.ref_count - count},
+            synchronize_session=False
+        )
+        unreferenced = db.query(StoredObject).filter(
+            StoredObject.content_hash == content_hash,
+            StoredObject.ref_count <= 0
+        ).with_for_update().first()
+        if unreferenced:
+            keys.append(unreferenced.s3_key)
+            if unreferenced.thumbnail_key:
+                keys.append(unreferenced.thumbnail_key)
+            if unreferenced.tile_prefix:
+                keys.append(f"{unreferenced.tile_prefix}/")
+            db.delete(unreferenced)
+    return keys
+
+
+def delete_files(keys: List[str]) -> None:
+    """Delete released files from storage; keys ending in '/' are tile prefixes."""
+    for key in keys:
+        if key.endswith("/"):
+            storage_service.delete_prefix(key)
+
+    storage_service.delete_many(key for key in keys if not key.endswith("/"))
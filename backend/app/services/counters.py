@@ -0,0 +1,178 @@
+from collections import Counter
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import delete, func, insert as sql_insert, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.dataset import Dataset
+from app.models.image import Image
+from app.models.annotation import Annotation, AnnotationType
+from app.models.dataset_stats import DatasetLabelCount, DatasetHistogramBucket
+
+LabelKey = Tuple[str, AnnotationType]
+
+
+def _add_label_counts(db: Session, dataset_id: int, label_deltas: Dict[LabelKey, int]) -> None:
+    """Upsert per-(label, type) annotation counts, in a fixed order to avoid lock-order deadlocks."""
+    for (label, annotation_type), delta in sorted(label_deltas.items(), key=lambda item: (item[0][0], item[0][1].value)):
+        if not delta:
+            continue
+        statement = insert(DatasetLabelCount).values(
+            dataset_id=dataset_id, label=label, annotation_type=annotation_type, count=delta
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[DatasetLabelCount.dataset_id, DatasetLabelCount.label, DatasetLabelCount.annotation_type],
+            set_={"count": DatasetLabelCount.count + statement.excluded.count}
+        )
+        db.execute(statement)
+
+
+def _add_histogram(db: Session, dataset_id: int, bucket_deltas: Dict[int, int]) -> None:
+    """Upsert the number of images per annotation count bucket."""
+    for annotation_count, delta in sorted(bucket_deltas.items()):
+        if not delta:
+            continue
+        statement = insert(DatasetHistogramBucket).values(
+            dataset_id=dataset_id, annotation_count=annotation_count, image_count=delta
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[DatasetHistogramBucket.dataset_id, DatasetHistogramBucket.annotation_count],
+            set_={"image_count": DatasetHistogramBucket.image_count + statement.excluded.image_count}
+        )
+        db.execute(statement)
+
+
+def add_images(db: Session, dataset_id: int, count: int) -> None:
+    """Count newly created (so still unannotated) images in the current transaction."""
+    db.execute(
+        update(Dataset).where(Dataset.id == dataset_id).values(image_count=Dataset.image_count + count)
+    )
+    _add_histogram(db, dataset_id, {0: count})
+
+
+def remove_image(db: Session, image: Image) -> None:
+    """Uncount an image and the annotations that will cascade with it, before it is deleted."""
+    labels = db.query(Annotation.label, Annotation.annotation_type, func.count(Annotation.id)).filter(
+        Annotation.image_id == image.id
+    ).group_by(Annotation.label, Annotation.annotation_type).all()
+
+    db.execute(
+        update(Dataset).where(Dataset.id == image.dataset_id).values(
+            image_count=Dataset.image_count - 1,
+            annotation_count=Dataset.annotation_count - image.annotation_count
+        )
+    )
+    _add_histogram(db, image.dataset_id, {image.annotation_count: -1})
+    _add_label_counts(db, image.dataset_id, {(label, annotation_type): -count for label, annotation_type, count in labels})
+
+
+def add_annotations(
+    db: Session,
+    dataset_id: int,
+    annotations: Iterable[Tuple[int, str, AnnotationType]],
+    sign: int = 1
+) -> None:
+    """
+    Count created (sign=1) or deleted (sign=-1) annotations in the current transaction.
+
+    `annotations` holds (image_id, label, annotation_type) tuples. Image and
+    dataset counters, the label counts and the per-image histogram are all
+    adjusted with atomic increments, so concurrent writers never lose updates.
+    """
+    image_deltas = Counter()
+    label_deltas = Counter()
+    for image_id, label, annotation_type in annotations:
+        image_deltas[image_id] += sign
+        label_deltas[(label, annotation_type)] += sign
+
+    if not image_deltas:
+        return
+
+    bucket_deltas = Counter()
+    for image_id, delta in sorted(image_deltas.items()):
+        new_count = db.execute(
+            update(Image).where(Image.id == image_id).values(
+                annotation_count=Image.annotation_count + delta
+            ).returning(Image.annotation_count)
+        ).scalar_one()
+        bucket_deltas[new_count - delta] -= 1
+        bucket_deltas[new_count] += 1
+
+    db.execute(
+        update(Dataset).where(Dataset.id == dataset_id).values(
+            annotation_count=Dataset.annotation_count + sum(image_deltas.values())
+        )
+    )
+    _add_histogram(db, dataset_id, bucket_deltas)
+    _add_label_counts(db, dataset_id, label_deltas)
+
+
+def relabel_annotations(db: Session, dataset_id: int, changes: Iterable[Tuple[LabelKey, LabelKey]]) -> None:
+    """Move annotations between label counts after their label or type changed, given (old, new) pairs."""
+    label_deltas = Counter()
+    for old, new in changes:
+        if old != new:
+            label_deltas[old] -= 1
+            label_deltas[new] += 1
+    _add_label_counts(db, dataset_id, label_deltas)
+
+
+def reconcile_counters(db: Session, dataset_id: Optional[int] = None) -> Dict[str, int]:
+    """
+    Recount image and dataset counters from the underlying rows and repair any drift.
+
+    Only rows whose stored counter disagrees are updated; the label counts
+    and histograms are rebuilt. Returns the number of images and datasets
+    fixed.
+    """
+    image_annotations = select(func.count(Annotation.id)).where(
+        Annotation.image_id == Image.id
+    ).scalar_subquery()
+    image_update = update(Image).where(Image.annotation_count != image_annotations).values(
+        annotation_count=image_annotations
+    )
+    if dataset_id is not None:
+        image_update = image_update.where(Image.dataset_id == dataset_id)
+    images_fixed = db.execute(image_update.execution_options(synchronize_session=False)).rowcount
+
+    dataset_images = select(func.count(Image.id)).where(
+        Image.dataset_id == Dataset.id
+    ).scalar_subquery()
+    dataset_annotations = select(func.coalesce(func.sum(Image.annotation_count), 0)).where(
+        Image.dataset_id == Dataset.id
+    ).scalar_subquery()
+    dataset_update = update(Dataset).where(
+        (Dataset.image_count != dataset_images) | (Dataset.annotation_count != dataset_annotations)
+    ).values(image_count=dataset_images, annotation_count=dataset_annotations)
+    if dataset_id is not None:
+        dataset_update = dataset_update.where(Dataset.id == dataset_id)
+    datasets_fixed = db.execute(dataset_update.execution_options(synchronize_session=False)).rowcount
+
+    label_counts = select(
+        Image.dataset_id, Annotation.label, Annotation.annotation_type, func.count(Annotation.id)
+    ).join(Image, Image.id == Annotation.image_id).group_by(
+        Image.dataset_id, Annotation.label, Annotation.annotation_type
+    )
+    histogram = select(
+        Image.dataset_id, Image.annotation_count, func.count(Image.id)
+    ).group_by(Image.dataset_id, Image.annotation_count)
+    clear_labels = delete(DatasetLabelCount)
+    clear_histogram = delete(DatasetHistogramBucket)
+    if dataset_id is not None:
+        label_counts = label_counts.where(Image.dataset_id == dataset_id)
+        histogram = histogram.where(Image.dataset_id == dataset_id)
+        clear_labels = clear_labels.where(DatasetLabelCount.dataset_id == dataset_id)
+        clear_histogram = clear_histogram.where(DatasetHistogramBucket.dataset_id == dataset_id)
+
+    db.execute(clear_labels)
+    db.execute(clear_histogram)
+    db.execute(sql_insert(DatasetLabelCount).from_select(
+        ["dataset_id", "label", "annotation_type", "count"], label_counts
+    ))
+    db.execute(sql_insert(DatasetHistogramBucket).from_select(
+        ["dataset_id", "annotation_count", "image_count"], histogram
+    ))
+
+    db.commit()
+    return {"images": images_fixed, "datasets": datasets_fixed}
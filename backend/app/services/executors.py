@@ -0,0 +1,64 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from app.core.config import settings
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_io_pool: Optional[ThreadPoolExecutor] = None
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Get the shared process pool for CPU-bound work such as image decoding."""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=settings.IMAGE_PROCESS_WORKERS)
+    return _process_pool
+
+
+def get_io_pool() -> ThreadPoolExecutor:
+    """Get the shared thread pool for blocking I/O such as object storage calls."""
+    global _io_pool
+    if _io_pool is None:
+        _io_pool = ThreadPoolExecutor(
+            max_workers=settings.STORAGE_IO_WORKERS,
+            thread_name_prefix="storage-io"
+        )
+    return _io_pool
+
+
+async def run_cpu_bound(func: Callable, *args: Any, **kwargs: Any) -> Any:
+    """Run a picklable function in the process pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_process_pool(), partial(func, *args, **kwargs))
+
+
+async def run_io_bound(func: Callable, *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking function in the I/O thread pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_io_pool(), partial(func, *args, **kwargs))
+
+
+def map_cpu_bound(func: Callable, *iterables: Iterable, chunksize: int = 1) -> Iterator[Any]:
+    """
+    Map a picklable function over iterables in the process pool, yielding results in order.
+
+    Daemonic processes such as Celery's prefork workers cannot start a pool
+    of their own, so there the function runs inline instead.
+    """
+    if multiprocessing.current_process().daemon:
+        return map(func, *iterables)
+    return get_process_pool().map(func, *iterables, chunksize=chunksize)
+
+
+def shutdown_executors() -> None:
+    """Shut down the shared pools."""
+    global _process_pool, _io_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=True)
+        _process_pool = None
+    if _io_pool is not None:
+        _io_pool.shutdown(wait=True)
+        _io_pool = None
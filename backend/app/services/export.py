@@ -0,0 +1,295 @@
+from collections import Counter
+from itertools import groupby, islice
+from typing import BinaryIO, Callable, Iterable, Iterator, List, Optional, Set, Tuple
+import io
+import json
+import posixpath
+import time
+import zipfile
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.image import Image
+from app.models.annotation import Annotation
+from app.services.executors import get_io_pool, map_cpu_bound
+from app.services.geometry import decode_geometry
+from app.services.storage import storage_service
+
+IMAGE_COLUMNS = (Image.id, Image.filename, Image.width, Image.height, Image.s3_key)
+ANNOTATION_COLUMNS = (
+    Annotation.id,
+    Annotation.label,
+    Annotation.annotation_type,
+    Annotation.coordinates,
+    Annotation.coordinates_blob,
+    Annotation.created_by,
+    Annotation.created_at,
+    Annotation.updated_at
+)
+
+
+def iter_image_annotations(
+    db: Session,
+    dataset_id: int,
+    include_unannotated: bool = False,
+    batch_size: int = None
+) -> Iterator[Tuple[dict, List[dict]]]:
+    """
+    Iterate a dataset's images with their annotations, one image at a time.
+
+    Rows come from a server-side cursor fetched `batch_size` at a time and
+    ordered by image id only, so Postgres can walk the (dataset_id, id) and
+    (image_id, label) indexes without sorting and memory stays bounded by
+    the largest image. Yields (image, annotations) as plain dicts.
+    """
+    if batch_size is None:
+        batch_size = settings.EXPORT_BATCH_SIZE
+
+    statement = select(*IMAGE_COLUMNS, *ANNOTATION_COLUMNS).where(Image.dataset_id == dataset_id)
+    if include_unannotated:
+        statement = statement.outerjoin(Annotation, Annotation.image_id == Image.id)
+    else:
+        statement = statement.join(Annotation, Annotation.image_id == Image.id)
+    statement = statement.order_by(Image.id).execution_options(yield_per=batch_size)
+
+    rows = db.execute(statement)
+    try:
+        for _, image_rows in groupby(rows, key=lambda row: row[0]):
+            image = None
+            annotations = []
+            for row in image_rows:
+                if image is None:
+                    image = dict(zip(("id", "filename", "width", "height", "s3_key"), row[:len(IMAGE_COLUMNS)]))
+                annotation = row[len(IMAGE_COLUMNS):]
+                if annotation[0] is not None:
+                    annotation_id, label, annotation_type, coordinates, blob, *rest = annotation
+                    annotations.append(dict(
+                        zip(("created_by", "created_at", "updated_at"), rest),
+                        id=annotation_id,
+                        label=label,
+                        annotation_type=annotation_type,
+                        geometry=decode_geometry(annotation_type, coordinates, blob)
+                    ))
+            yield image, annotations
+    finally:
+        rows.close()
+
+
+def ndjson_line(image: dict, annotations: List[dict]) -> bytes:
+    """One image and its annotations as a line of newline-delimited JSON."""
+    return json.dumps({
+        "image_id": image["id"],
+        "filename": image["filename"],
+        "width": image["width"],
+        "height": image["height"],
+        "annotations": [
+            {
+                "id": annotation["id"],
+                "label": annotation["label"],
+                "annotation_type": annotation["annotation_type"].value,
+                "geometry": annotation["geometry"],
+                "created_by": annotation["created_by"],
+                "created_at": annotation["created_at"].isoformat(),
+                "updated_at": annotation["updated_at"].isoformat()
+            }
+            for annotation in annotations
+        ]
+    }, separators=(",", ":")).encode() + b"\n"
+
+
+def chunked(lines: Iterator[bytes], chunk_size: int = None) -> Iterator[bytes]:
+    """Coalesce small lines into chunks of about `chunk_size` bytes for fewer, larger writes."""
+    if chunk_size is None:
+        chunk_size = settings.EXPORT_CHUNK_SIZE
+
+    buffer = []
+    buffered = 0
+    for line in lines:
+        buffer.append(line)
+        buffered += len(line)
+        if buffered >= chunk_size:
+            yield b"".join(buffer)
+            buffer = []
+            buffered = 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+class IteratorReader(io.RawIOBase):
+    """Read-only file object over an iterator of byte chunks, so generated output can be uploaded as a stream."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self.chunks = iter(chunks)
+        self.pending = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self.pending:
+            try:
+                self.pending = memoryview(next(self.chunks))
+            except StopIteration:
+                return 0
+
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+
+def open_chunks(chunks: Iterable[bytes], buffer_size: int = None) -> BinaryIO:
+    """
+    Wrap byte chunks in a buffered file object.
+
+    Buffered reads return full-sized blocks until the end, as multipart
+    uploads need every part but the last to reach the minimum part size.
+    """
+    if buffer_size is None:
+        buffer_size = settings.S3_MULTIPART_CHUNK_SIZE
+    return io.BufferedReader(IteratorReader(chunks), buffer_size)
+
+
+def export_prefix(dataset_id: int) -> str:
+    """Storage prefix holding every export of a dataset."""
+    return f"exports/{dataset_id}/"
+
+
+def export_key(dataset_id: int, job_id: int, extension: str) -> str:
+    """Storage key of an export job's result."""
+    return f"{export_prefix(dataset_id)}{job_id}.{extension}"
+
+
+def use_snapshot(db: Session) -> None:
+    """Run the session's next transaction in one REPEATABLE READ snapshot, so every cursor of an export sees the same rows."""
+    db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+
+
+def dataset_labels(db: Session, dataset_id: int) -> List[str]:
+    """Every label used in a dataset, sorted, for numbering classes and categories."""
+    return db.scalars(
+        select(Annotation.label).join(Image, Image.id == Annotation.image_id).where(
+            Image.dataset_id == dataset_id
+        ).distinct().order_by(Annotation.label)
+    ).all()
+
+
+class _ZipOutput(io.RawIOBase):
+    """Write-only, unseekable sink that hands the bytes zipfile writes back to a generator."""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def iter_zip(entries: Iterable[Tuple[str, bytes, bool]]) -> Iterator[bytes]:
+    """
+    Stream a ZIP archive of (name, data, compress) entries as it is written.
+
+    zipfile sees an unseekable file, so each member is followed by a data
+    descriptor instead of being patched in place, and nothing is staged on
+    disk. ZIP64 records are added once the archive passes 4GB or 65535
+    members. Already compressed data such as JPEGs should be stored as is.
+    """
+    output = _ZipOutput()
+    date_time = time.localtime()[:6]
+    with zipfile.ZipFile(output, "w", allowZip64=True) as archive:
+        for name, data, compress in entries:
+            info = zipfile.ZipInfo(name, date_time=date_time)
+            info.compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+            archive.writestr(info, data)
+            yield output.drain()
+    yield output.drain()
+
+
+def archive_name(image: dict, used_stems: Set[str]) -> str:
+    """
+    File name of an image inside an export archive.
+
+    Label files are paired with images by stem, so an image whose stem is
+    already taken is prefixed with its id.
+    """
+    name = posixpath.basename(image["filename"]) or str(image["id"])
+    stem = posixpath.splitext(name)[0]
+    if stem in used_stems:
+        name = f"{image['id']}_{name}"
+        stem = posixpath.splitext(name)[0]
+    used_stems.add(stem)
+    return name
+
+
+def iter_label_archive(
+    db: Session,
+    dataset_id: int,
+    stats: Counter,
+    render: Callable[[dict, List[dict]], bytes],
+    image_dir: str,
+    label_dir: str,
+    label_extension: str,
+    include_images: bool = True,
+    batch_size: int = None
+) -> Iterator[Tuple[str, bytes, bool]]:
+    """
+    Build the entries of a per-image label archive (YOLO, Pascal VOC), batch by batch.
+
+    For each batch of images, `render(image, annotations)` runs in the
+    worker processes to produce the label files while the originals are
+    downloaded concurrently on the storage transfer pool. The next batch
+    is started before the current one is written, so fetching, rendering
+    and writing overlap. Images without known dimensions cannot be
+    normalized and are skipped. Yields (name, data, compress) entries for
+    iter_zip.
+    """
+    if batch_size is None:
+        batch_size = settings.EXPORT_IMAGE_BATCH_SIZE
+
+    used_stems: Set[str] = set()
+    rows = iter_image_annotations(db, dataset_id, include_unannotated=True)
+
+    def submit(batch: List[Tuple[dict, List[dict]]]):
+        for image, _ in batch:
+            image["archive_name"] = archive_name(image, used_stems)
+        labels = map_cpu_bound(render, *zip(*batch), chunksize=max(1, len(batch) // settings.IMAGE_PROCESS_WORKERS))
+        originals = None
+        if include_images:
+            originals = get_io_pool().submit(storage_service.download_many, [image["s3_key"] for image, _ in batch])
+        return batch, labels, originals
+
+    def write(batch, labels, originals) -> Iterator[Tuple[str, bytes, bool]]:
+        data: List[Optional[bytes]] = originals.result() if originals else [None] * len(batch)
+        for (image, annotations), label, original in zip(batch, labels, data):
+            stem = posixpath.splitext(image["archive_name"])[0]
+            yield f"{label_dir}/{stem}.{label_extension}", label, True
+            if include_images:
+                if original is None:
+                    print(f"Skipping missing original of image {image['id']}")
+                else:
+                    yield f"{image_dir}/{image['archive_name']}", original, False
+            stats["images"] += 1
+            stats["annotations"] += len(annotations)
+
+    sized = ((image, annotations) for image, annotations in rows if image["width"] and image["height"])
+    pending = None
+    while True:
+        batch = list(islice(sized, batch_size))
+        if not batch:
+            break
+        submitted = submit(batch)
+        if pending is not None:
+            yield from write(*pending)
+        pending = submitted
+    if pending is not None:
+        yield from write(*pending)
@@ -0,0 +1,202 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numbers
+
+import numpy as np
+
+from app.core.config import settings
+from app.models.annotation import AnnotationType
+
+# Packed geometry is little-endian float32 (x, y) pairs
+PACKED_DTYPE = np.dtype("<f4")
+
+BBOX_FIELDS = ("x", "y", "width", "height")
+POINT_FIELDS = ("x", "y")
+BOUNDS_FIELDS = ("min_x", "min_y", "max_x", "max_y")
+
+
+class GeometryError(ValueError):
+    """Raised when a geometry does not match the schema of its annotation type."""
+
+
+def _is_number(value: Any) -> bool:
+    """Whether a coordinate is a real number; NumPy would also coerce "12" and True."""
+    return isinstance(value, numbers.Real) and not isinstance(value, bool)
+
+
+def _round(values: np.ndarray) -> np.ndarray:
+    """Snap coordinates to the stored precision, so JSON and float32 forms agree."""
+    return np.round(values, settings.GEOMETRY_PRECISION)
+
+
+def _encode_shapes(
+    annotation_type: AnnotationType,
+    geometries: List[Any],
+    bounds: np.ndarray
+) -> Tuple[List[List[float]], List[List[float]]]:
+    """
+    Validate, clip and round many boxes or points as a single array.
+
+    `bounds` holds each shape's (width, height), inf where unknown. Returns
+    the stored coordinates and the (min_x, min_y, max_x, max_y) extent of
+    each shape. Raises GeometryError with the position of the first invalid
+    shape in `args[1]`.
+    """
+    fields = BBOX_FIELDS if annotation_type == AnnotationType.BBOX else POINT_FIELDS
+
+    rows = []
+    for position, geometry in enumerate(geometries):
+        if not isinstance(geometry, dict) or any(field not in geometry for field in fields):
+            raise GeometryError(f"{annotation_type.value} geometry needs {', '.join(fields)}", position)
+        row = [geometry[field] for field in fields]
+        if not all(_is_number(value) for value in row):
+            raise GeometryError(f"{annotation_type.value} geometry must be numeric", position)
+        rows.append(row)
+
+    values = np.asarray(rows, dtype=np.float64).reshape(len(rows), len(fields))
+
+    invalid = ~np.isfinite(values).all(axis=1)
+    if annotation_type == AnnotationType.BBOX:
+        # Clip the corners, then rebuild each box from what is left inside its image
+        invalid |= (values[:, 2] <= 0) | (values[:, 3] <= 0)
+        corners = np.clip(
+            np.concatenate([values[:, :2], values[:, :2] + values[:, 2:]], axis=1),
+            0, np.tile(bounds, 2)
+        )
+        corners = _round(corners)
+        values = _round(np.concatenate([corners[:, :2], corners[:, 2:] - corners[:, :2]], axis=1))
+        invalid |= (values[:, 2] <= 0) | (values[:, 3] <= 0)
+    else:
+        values = _round(np.clip(values, 0, bounds))
+        corners = np.tile(values, 2)
+
+    if invalid.any():
+        raise GeometryError(f"invalid or empty {annotation_type.value} geometry", int(np.argmax(invalid)))
+
+    return values.tolist(), corners.tolist()
+
+
+def encode_geometries(
+    items: Sequence[Tuple[AnnotationType, Any, Optional[int], Optional[int]]]
+) -> List[Dict[str, Any]]:
+    """
+    Validate, clip and normalize many geometries and pack them for storage.
+
+    `items` holds (annotation_type, geometry, image_width, image_height)
+    tuples; images without known dimensions are not clipped. Boxes and
+    points are processed as one array per type, polygons as one array per
+    polygon, and coordinates are rounded to GEOMETRY_PRECISION decimals.
+    Returns the column values of each item: `coordinates` as a flat list,
+    or `coordinates_blob` as packed float32 for polygons with more than
+    GEOMETRY_INLINE_POINTS vertices. The bounding box columns (min_x, min_y,
+    max_x, max_y) are derived alongside. Raises GeometryError naming the
+    index of the first invalid item.
+    """
+    encoded: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    shapes: Dict[AnnotationType, List[int]] = {AnnotationType.BBOX: [], AnnotationType.POINT: []}
+
+    for index, (annotation_type, geometry, width, height) in enumerate(items):
+        if annotation_type != AnnotationType.POLYGON:
+            shapes[annotation_type].append(index)
+            continue
+        try:
+            encoded[index] = _encode_polygon(geometry, width, height)
+        except GeometryError as e:
+            raise GeometryError(f"Annotation {index}: {e.args[0]}")
+
+    for annotation_type, indices in shapes.items():
+        if not indices:
+            continue
+
+        bounds = np.array(
+            [(items[index][2] or np.inf, items[index][3] or np.inf) for index in indices],
+            dtype=np.float64
+        )
+        try:
+            rows, extents = _encode_shapes(annotation_type, [items[index][1] for index in indices], bounds)
+        except GeometryError as e:
+            raise GeometryError(f"Annotation {indices[e.args[1]]}: {e.args[0]}")
+
+        for index, row, extent in zip(indices, rows, extents):
+            encoded[index] = {"coordinates": row, "coordinates_blob": None, **dict(zip(BOUNDS_FIELDS, extent))}
+
+    return encoded
+
+
+def encode_geometry(
+    annotation_type: AnnotationType,
+    geometry: Any,
+    width: Optional[int] = None,
+    height: Optional[int] = None
+) -> Dict[str, Any]:
+    """Validate, clip and pack a single geometry; see encode_geometries."""
+    if annotation_type == AnnotationType.POLYGON:
+        return _encode_polygon(geometry, width, height)
+
+    bounds = np.array([(width or np.inf, height or np.inf)], dtype=np.float64)
+    try:
+        rows, extents = _encode_shapes(annotation_type, [geometry], bounds)
+    except GeometryError as e:
+        raise GeometryError(e.args[0])
+    return {"coordinates": rows[0], "coordinates_blob": None, **dict(zip(BOUNDS_FIELDS, extents[0]))}
+
+
+def _encode_polygon(geometry: Any, width: Optional[int], height: Optional[int]) -> Dict[str, Any]:
+    if not isinstance(geometry, dict) or "points" not in geometry:
+        raise GeometryError("polygon geometry needs points")
+
+    points = geometry["points"]
+    if not isinstance(points, (list, tuple)) or not all(
+        isinstance(point, (list, tuple)) and all(_is_number(value) for value in point) for point in points
+    ):
+        raise GeometryError("polygon geometry must be numeric")
+
+    points = np.asarray(points, dtype=np.float64) if len({len(point) for point in points}) == 1 else None
+    if points is None or points.ndim != 2 or points.shape[1] != 2 or len(points) < 3:
+        raise GeometryError("polygon geometry needs at least 3 [x, y] points")
+    if not np.isfinite(points).all():
+        raise GeometryError("polygon coordinates must be finite")
+
+    if width and height:
+        points = np.clip(points, 0, [width, height])
+    points = _round(points)
+
+    # Drop consecutive duplicates left behind by clipping
+    keep = np.ones(len(points), dtype=bool)
+    keep[1:] = (np.diff(points, axis=0) != 0).any(axis=1)
+    points = points[keep]
+    if len(points) < 3:
+        raise GeometryError("polygon lies outside the image")
+
+    extent = dict(zip(BOUNDS_FIELDS, np.concatenate([points.min(axis=0), points.max(axis=0)]).tolist()))
+    if len(points) > settings.GEOMETRY_INLINE_POINTS:
+        return {"coordinates": None, "coordinates_blob": points.astype(PACKED_DTYPE).tobytes(), **extent}
+    return {"coordinates": points.ravel().tolist(), "coordinates_blob": None, **extent}
+
+
+def decode_coordinates(coordinates: Optional[List[float]], coordinates_blob: Optional[bytes]) -> List[float]:
+    """The stored coordinates as a flat [x, y, ...] list, whichever column holds them."""
+    if coordinates_blob is not None:
+        return _round(np.frombuffer(coordinates_blob, dtype=PACKED_DTYPE).astype(np.float64)).tolist()
+    return coordinates or []
+
+
+def polygon_area(values: List[float]) -> float:
+    """Area of a polygon given as a flat [x, y, ...] list, by the shoelace formula."""
+    points = np.asarray(values, dtype=np.float64).reshape(-1, 2)
+    x, y = points[:, 0], points[:, 1]
+    return float(abs(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))) / 2)
+
+
+def decode_geometry(
+    annotation_type: AnnotationType,
+    coordinates: Optional[List[float]],
+    coordinates_blob: Optional[bytes]
+) -> Dict[str, Any]:
+    """Rebuild the API form of a stored geometry."""
+    values = decode_coordinates(coordinates, coordinates_blob)
+
+    if annotation_type == AnnotationType.BBOX:
+        return dict(zip(BBOX_FIELDS, values))
+    if annotation_type == AnnotationType.POINT:
+        return dict(zip(POINT_FIELDS, values))
+    return {"points": [values[i:i + 2] for i in range(0, len(values) - 1, 2)]}
@@ -1,11 +1,39 @@
 from PIL import Image as PILImage
 from io import BytesIO
-from typing import Tuple, Optional
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator, Tuple, Optional, Union
+import math
+import os
 import uuid
 
 from app.core.config import settings
 
 
+# Formats Pillow can decode in draft (reduced-resolution) mode
+DRAFT_FORMATS = {"JPEG", "MPO"}
+
+CONTENT_TYPES = {
+    "JPEG": "image/jpeg",
+    "MPO": "image/jpeg",
+    "PNG": "image/png",
+    "GIF": "image/gif",
+    "BMP": "image/bmp",
+    "TIFF": "image/tiff",
+    "WEBP": "image/webp",
+}
+
+
+@dataclass
+class ProcessedImage:
+    """Result of ingesting an image: metadata plus the encoded thumbnail."""
+    width: int
+    height: int
+    format: str
+    content_type: str
+    size: int
+    thumbnail: bytes
+
+
 def generate_unique_key(filename: str, prefix: str = "images") -> str:
     """Generate a unique S3 key for a file."""
     unique_id = str(uuid.uuid4())
@@ -13,56 +41,126 @@ def generate_unique_key(filename: str, prefix: str = "images") -> str:
     return f"{prefix}/{unique_id}.{extension}"
 
 
-def get_image_dimensions(image_data: bytes) -> Tuple[int, int]:
-    """Get width and height of an image."""
-    try:
-        image = PILImage.open(BytesIO(image_data))
-        return image.size
-    except Exception as e:
-        print(f"Error getting image dimensions: {e}")
-        return (0, 0)
+def _to_thumbnail_mode(image: PILImage.Image) -> PILImage.Image:
+    """Convert an image to a mode that can be saved as JPEG."""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = PILImage.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.split()[3])
+        return background
 
+    if image.mode not in ('RGB', 'L'):
+        return image.convert('RGB')
 
-def create_thumbnail(image_data: bytes, size: Tuple[int, int] = None) -> Optional[bytes]:
-    """Create a thumbnail from an image."""
-    if size is None:
-        size = settings.THUMBNAIL_SIZE
+    return image
+
+
+def process_image(
+    image_data: Union[bytes, BinaryIO],
+    max_size: int = None,
+    thumbnail_size: Tuple[int, int] = None
+) -> Optional[ProcessedImage]:
+    """
+    Validate an image, read its dimensions and build its thumbnail from a single decode.
+
+    JPEGs are decoded in draft mode, so the decoder scales the image down by
+    up to 8x while decoding instead of materialising the full-resolution bitmap.
+    Accepts raw bytes or a seekable binary file object, such as the spooled
+    file behind an UploadFile, which is read without copying it into memory.
+    Returns None if the data is too large or is not a decodable image.
+    """
+    if max_size is None:
+        max_size = settings.MAX_UPLOAD_SIZE
+    if thumbnail_size is None:
+        thumbnail_size = settings.THUMBNAIL_SIZE
+
+    if isinstance(image_data, (bytes, bytearray)):
+        size = len(image_data)
+        source = BytesIO(image_data)
+    else:
+        source = image_data
+        source.seek(0, os.SEEK_END)
+        size = source.tell()
+        source.seek(0)
+
+    if size > max_size:
+        return None
 
     try:
-        image = PILImage.open(BytesIO(image_data))
+        image = PILImage.open(source)
+        image_format = image.format
+        width, height = image.size
+
+        if image_format in DRAFT_FORMATS:
+            image.draft('RGB', thumbnail_size)
 
-        # Convert RGBA to RGB if necessary
-        if image.mode == 'RGBA':
-            background = PILImage.new('RGB', image.size, (255, 255, 255))
-            background.paste(image, mask=image.split()[3])
-            image = background
+        # Forces the actual decode, which fails on truncated or corrupt data
+        image.load()
 
-        # Create thumbnail (maintains aspect ratio)
-        image.thumbnail(size, PILImage.Resampling.LANCZOS)
+        image = _to_thumbnail_mode(image)
+        image.thumbnail(thumbnail_size, PILImage.Resampling.LANCZOS)
 
-        # Save to bytes
         output = BytesIO()
         image.save(output, format='JPEG', quality=85)
-        output.seek(0)
-        return output.read()
+
+        return ProcessedImage(
+            width=width,
+            height=height,
+            format=image_format,
+            content_type=CONTENT_TYPES.get(image_format, "application/octet-stream"),
+            size=size,
+            thumbnail=output.getvalue()
+        )
     except Exception as e:
-        print(f"Error creating thumbnail: {e}")
+        print(f"Error processing image: {e}")
         return None
 
 
-def validate_image(file_data: bytes, max_size: int = None) -> bool:
-    """Validate image file."""
-    if max_size is None:
-        max_size = settings.MAX_UPLOAD_SIZE
+def pyramid_levels(width: int, height: int) -> int:
+    """Number of deep-zoom levels: level 0 is 1x1 and the last level is full size."""
+    return math.ceil(math.log2(max(width, height, 1))) + 1
 
-    # Check file size
-    if len(file_data) > max_size:
-        return False
 
-    # Check if it's a valid image
-    try:
-        image = PILImage.open(BytesIO(file_data))
-        image.verify()
-        return True
-    except Exception:
-        return False
+def needs_pyramid(width: int, height: int) -> bool:
+    """Whether an image is large enough to be served as tiles."""
+    return max(width or 0, height or 0) > settings.PYRAMID_MIN_DIMENSION
+
+
+def generate_pyramid(image_data: bytes, tile_size: int = None) -> Iterator[Tuple[int, int, int, bytes]]:
+    """
+    Cut an image into a deep-zoom style tile pyramid.
+
+    Yields (level, column, row, jpeg_bytes) from the full-resolution level
+    down to level 0. Each level halves the previous one, so the image is
+    decoded once and only one level is held in memory at a time.
+    """
+    if tile_size is None:
+        tile_size = settings.TILE_SIZE
+
+    image = PILImage.open(BytesIO(image_data))
+    image.load()
+    image = _to_thumbnail_mode(image)
+
+    level = pyramid_levels(*image.size) - 1
+    while True:
+        width, height = image.size
+        for row in range(math.ceil(height / tile_size)):
+            for column in range(math.ceil(width / tile_size)):
+                box = (
+                    column * tile_size,
+                    row * tile_size,
+                    min((column + 1) * tile_size, width),
+                    min((row + 1) * tile_size, height)
+                )
+                output = BytesIO()
+                image.crop(box).save(output, format='JPEG', quality=85)
+                yield level, column, row, output.getvalue()
+
+        if level == 0:
+            break
+
+        image = image.resize(
+            (max(1, math.ceil(width / 2)), max(1, math.ceil(height / 2))),
+            PILImage.Resampling.LANCZOS
+        )
+        level -= 1
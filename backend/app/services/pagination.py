@@ -0,0 +1,53 @@
+from typing import Optional
+import base64
+import json
+
+from sqlalchemy.orm import Query
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def encode_cursor(last_id: int) -> str:
+    """Encode the key of the last row of a page as an opaque cursor."""
+    payload = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Decode a cursor produced by encode_cursor back into the key it points past."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded))["id"]
+    except (ValueError, TypeError, KeyError) as e:
+        raise InvalidCursorError(cursor) from e
+
+    if not isinstance(last_id, int):
+        raise InvalidCursorError(cursor)
+    return last_id
+
+
+def paginate(query: Query, key, limit: int, cursor: Optional[str] = None, skip: int = 0) -> dict:
+    """
+    Fetch one page of `query` ordered by the unique, indexed column `key`.
+
+    With a cursor the page starts right after the row it encodes (keyset
+    pagination), so deep pages cost the same as the first one. Without a
+    cursor `skip` is applied as a plain offset for older clients. One extra
+    row is fetched to tell whether a next page exists.
+    """
+    query = query.order_by(key)
+    if cursor:
+        query = query.filter(key > decode_cursor(cursor))
+    elif skip:
+        query = query.offset(skip)
+
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(getattr(rows[-1], key.key))
+
+    return {"items": rows, "next_cursor": next_cursor}
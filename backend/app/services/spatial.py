@@ -0,0 +1,118 @@
+from itertools import groupby
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.image import Image
+from app.models.annotation import Annotation, bbox_expression
+
+BOX_COLUMNS = (Annotation.min_x, Annotation.min_y, Annotation.max_x, Annotation.max_y)
+
+
+def intersects(min_x: float, min_y: float, max_x: float, max_y: float):
+    """Filter for annotations whose bounding box touches a region, served by the GiST box index."""
+    return bbox_expression().op("&&")(func.box(func.point(min_x, min_y), func.point(max_x, max_y)))
+
+
+def pairwise_iou(boxes: np.ndarray, others: np.ndarray) -> np.ndarray:
+    """
+    Intersection over union of every box in `boxes` against every box in `others`.
+
+    Both are (n, 4) arrays of (min_x, min_y, max_x, max_y). Degenerate boxes
+    (points and lines) have no area, so they count as fully overlapping only
+    with an identical box.
+    """
+    top_left = np.maximum(boxes[:, None, :2], others[None, :, :2])
+    bottom_right = np.minimum(boxes[:, None, 2:], others[None, :, 2:])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+
+    areas = np.prod(boxes[:, 2:] - boxes[:, :2], axis=1)
+    other_areas = np.prod(others[:, 2:] - others[:, :2], axis=1)
+    union = areas[:, None] + other_areas[None, :] - intersection
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        iou = np.where(union > 0, intersection / union, 0.0)
+    identical = (boxes[:, None, :] == others[None, :, :]).all(axis=2)
+    return np.where(identical, 1.0, iou)
+
+
+def find_overlaps(
+    ids: Sequence[int],
+    labels: Sequence[str],
+    boxes: np.ndarray,
+    min_iou: float,
+    same_label: bool = True,
+    block_size: Optional[int] = None
+) -> List[Tuple[int, int, float]]:
+    """
+    Find pairs of annotations on one image whose boxes overlap by at least `min_iou`.
+
+    The IoU matrix is computed `block_size` rows at a time, so memory stays
+    bounded on dense images. Each pair is reported once, as (id, other_id,
+    iou) with id < other_id, strongest overlaps first.
+    """
+    if block_size is None:
+        block_size = settings.OVERLAP_BLOCK_SIZE
+
+    order = np.argsort(np.asarray(ids))
+    ids = np.asarray(ids)[order]
+    boxes = np.asarray(boxes, dtype=np.float64)[order]
+    _, codes = np.unique(np.asarray(labels, dtype=object)[order], return_inverse=True)
+
+    pairs = []
+    for start in range(0, len(ids), block_size):
+        iou = pairwise_iou(boxes[start:start + block_size], boxes)
+        rows = np.arange(start, start + len(iou))
+        # Upper triangle only: every pair once, never an annotation with itself
+        mask = (iou >= min_iou) & (np.arange(len(ids))[None, :] > rows[:, None])
+        if same_label:
+            mask &= codes[start:start + block_size, None] == codes[None, :]
+
+        first, second = np.nonzero(mask)
+        pairs.extend(zip(
+            ids[first + start].tolist(),
+            ids[second].tolist(),
+            np.round(iou[first, second], 4).tolist()
+        ))
+
+    pairs.sort(key=lambda pair: (-pair[2], pair[0], pair[1]))
+    return pairs
+
+
+def iter_image_boxes(
+    db: Session,
+    dataset_id: int,
+    after_image_id: int = 0,
+    batch_size: int = None
+) -> Iterator[Tuple[int, List[int], List[str], np.ndarray]]:
+    """
+    Iterate the annotation boxes of a dataset one image at a time, from `after_image_id` on.
+
+    Rows come from a server-side cursor in image id order, as in the export.
+    Yields (image_id, annotation ids, labels, (n, 4) box array).
+    """
+    if batch_size is None:
+        batch_size = settings.EXPORT_BATCH_SIZE
+
+    statement = select(Annotation.image_id, Annotation.id, Annotation.label, *BOX_COLUMNS).join(
+        Image, Image.id == Annotation.image_id
+    ).where(
+        Image.dataset_id == dataset_id,
+        Annotation.image_id > after_image_id
+    ).order_by(Annotation.image_id).execution_options(yield_per=batch_size)
+
+    rows = db.execute(statement)
+    try:
+        for image_id, image_rows in groupby(rows, key=lambda row: row[0]):
+            image_rows = list(image_rows)
+            yield (
+                image_id,
+                [row[1] for row in image_rows],
+                [row[2] for row in image_rows],
+                np.array([row[3:] for row in image_rows], dtype=np.float64)
+            )
+    finally:
+        rows.close()
@@ -0,0 +1,389 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Dict, List, Optional, Set, Tuple
+import hashlib
+import mimetypes
+import posixpath
+import tarfile
+import zipfile
+
+from sqlalchemy import insert
+
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.image import Image, ImageStatus
+from app.models.annotation import Annotation
+from app.models.annotation_change import ChangeOperation
+from app.models.ingest_job import IngestJob, JobStatus
+from app.models.stored_object import StoredObject
+from app.services.storage import storage_service
+from app.services.content import content_key, file_extension, acquire_objects, lock_objects
+from app.services.image import generate_unique_key
+from app.services.counters import add_images, add_annotations
+from app.services.cache import get_response_cache
+from app.services.changes import record_changes
+from app.services.geometry import encode_geometry, encode_geometries, GeometryError
+from app.services.archive import (
+    IMAGE_EXTENSIONS,
+    YOLO_CLASS_FILES,
+    in_labels_directory,
+    index_by_basename,
+    is_yolo_labels,
+    iter_archive,
+    member_extension,
+    member_path,
+    member_stem,
+    parse_coco,
+    parse_yolo_classes,
+    parse_yolo_labels,
+    resolve_member,
+    yolo_image_stems
+)
+from app.tasks.ingest import build_derivatives, StorageUnavailableError
+
+DERIVED_FIELDS = ("thumbnail_key", "width", "height", "tile_prefix", "tile_size")
+ANNOTATION_BATCH_SIZE = 1000
+
+
+class ArchiveImport:
+    """One archive being streamed into a dataset, with any bundled COCO/YOLO annotations."""
+
+    def __init__(self, db, job: IngestJob):
+        self.db = db
+        self.job = job
+        self.images: Dict[str, Tuple[int, int, int]] = {}  # member path -> (image id, width, height)
+        self.coco_annotations: Dict[Tuple[str, str], List[dict]] = {}  # (directory, file_name) -> annotations
+        self.yolo_labels: Dict[str, str] = {}  # member path -> label file text
+        self.image_stems: Set[str] = set()  # Member paths of the images so far, without extension
+        self.class_names: List[str] = []
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.UPLOAD_CONCURRENCY,
+            thread_name_prefix="archive-ingest"
+        )
+
+    def run(self, fileobj: BinaryIO, fmt: str) -> None:
+        """Stream every member of the archive through the ingest pipeline."""
+        batch = []
+        try:
+            for name, size, read in iter_archive(fileobj, fmt):
+                basename = posixpath.basename(name)
+                if basename.startswith(".") or name.startswith("__MACOSX/"):
+                    continue
+
+                path = member_path(name)
+                extension = member_extension(name)
+                if extension in IMAGE_EXTENSIONS:
+                    self.job.total_count += 1
+                    if size > settings.MAX_UPLOAD_SIZE:
+                        self.job.failed_count += 1
+                        continue
+
+                    self.image_stems.add(member_stem(path))
+                    batch.append((path, read()))
+                    if len(batch) >= settings.ARCHIVE_BATCH_SIZE:
+                        self.ingest_batch(batch)
+                        batch = []
+                elif extension == "json" and size <= settings.MAX_ANNOTATION_FILE_SIZE:
+                    try:
+                        for file_name, annotations in parse_coco(read()).items():
+                            self.coco_annotations[(posixpath.dirname(path), file_name)] = annotations
+                    except (ValueError, KeyError, TypeError) as e:
+                        print(f"Skipping annotation file {name}: {e}")
+                elif basename in YOLO_CLASS_FILES:
+                    try:
+                        self.class_names = parse_yolo_classes(read())
+                    except UnicodeDecodeError as e:
+                        print(f"Skipping class names file {name}: {e}")
+                elif extension == "txt" and size <= settings.MAX_ANNOTATION_FILE_SIZE:
+                    text = read().decode("utf-8", errors="ignore")
+                    # Keep label files only; a label may come before its image in the archive
+                    if in_labels_directory(path) or member_stem(path) in self.image_stems or is_yolo_labels(text):
+                        self.yolo_labels[path] = text
+
+            if batch:
+                self.ingest_batch(batch)
+        finally:
+            self.executor.shutdown(wait=True)
+
+        self.import_annotations()
+
+    def store_object(
+        self,
+        path: str,
+        data: bytes,
+        content_hash: str,
+        s3_key: Optional[str] = None,
+        upload: bool = True
+    ) -> Optional[dict]:
+        """
+        Build derivatives and upload the original of a member to `s3_key`, its content key by default.
+
+        With upload=False the original is already stored at `s3_key`, as for
+        an object still pending, and only the derivatives are built.
+        """
+        derivatives = build_derivatives(data, content_hash)
+        if derivatives is None:
+            return None
+
+        if s3_key is None:
+            s3_key = content_key(content_hash, extension=file_extension(path))
+        if not upload:
+            return {**derivatives, "s3_key": s3_key}
+
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if not storage_service.upload_file(data, s3_key, content_type):
+            raise StorageUnavailableError(s3_key)
+
+        return {**derivatives, "s3_key": s3_key, "content_type": content_type, "size": len(data)}
+
+    def ingest_batch(self, batch: List[Tuple[str, bytes]]) -> None:
+        """
+        Process a batch of members concurrently and commit their images in bulk.
+
+        Decoding and uploads run before any row is locked. The stored objects
+        are then locked and re-checked just before the insert, so concurrent
+        uploads and deletes of the same bytes only wait for the commit.
+        """
+        hashed = [(path, data, hashlib.sha256(data).hexdigest()) for path, data in batch]
+        members = {content_hash: (path, data) for path, data, content_hash in hashed}
+
+        seen = {
+            stored.content_hash: stored
+            for stored in self.db.query(StoredObject).filter(StoredObject.content_hash.in_(members)).all()
+        }
+
+        # Decode each distinct object that is not already processed; upload originals not yet stored
+        futures = {}
+        for content_hash, (path, data) in members.items():
+            stored = seen.get(content_hash)
+            if stored is None:
+                futures[content_hash] = self.executor.submit(self.store_object, path, data, content_hash)
+            elif not stored.thumbnail_key:
+                futures[content_hash] = self.executor.submit(
+                    self.store_object, path, data, content_hash, stored.s3_key, upload=False
+                )
+        created = {content_hash: future.result() for content_hash, future in futures.items()}
+
+        existing = lock_objects(self.db, members)
+        for content_hash in seen.keys() - existing.keys():
+            # Released since the lookup: its files may still be deleted after
+            # that transaction, so store this copy under a fresh key
+            path, data = members[content_hash]
+            created[content_hash] = self.store_object(
+                path, data, content_hash, generate_unique_key(path)
+            )
+
+        orphans = []
+        for content_hash, stored in existing.items():
+            values = created.get(content_hash)
+            if not values:
+                continue
+            if not stored.thumbnail_key:
+                # Still pending: complete the shared object, so its pending images need no decode
+                for field in DERIVED_FIELDS:
+                    setattr(stored, field, values[field])
+            if values["s3_key"] != stored.s3_key:
+                # Created concurrently under another key: the copy uploaded here is not needed
+                orphans.append(values["s3_key"])
+
+        rows = []
+        paths = []
+        reference_counts = Counter()
+        for path, data, content_hash in hashed:
+            stored = existing.get(content_hash)
+            if stored is not None and stored.thumbnail_key:
+                values = {field: getattr(stored, field) for field in DERIVED_FIELDS}
+                values["s3_key"] = stored.s3_key
+            else:
+                values = created.get(content_hash)
+                if values is None:
+                    self.job.failed_count += 1
+                    continue
+
+            paths.append(path)
+            rows.append({
+                "filename": posixpath.basename(path),
+                "dataset_id": self.job.dataset_id,
+                "s3_key": values["s3_key"],
+                "content_hash": content_hash,
+                "status": ImageStatus.READY,
+                "ingest_job_id": self.job.id,
+                **{field: values[field] for field in DERIVED_FIELDS}
+            })
+            reference_counts[content_hash] += 1
+
+        objects = {}
+        for content_hash, count in reference_counts.items():
+            if content_hash in existing:
+                stored = existing[content_hash]
+                objects[content_hash] = {"s3_key": stored.s3_key, "size": stored.size, "ref_count": count}
+            else:
+                objects[content_hash] = {**created[content_hash], "ref_count": count}
+        acquire_objects(self.db, objects)
+
+        if rows:
+            image_ids = self.db.scalars(
+                insert(Image).returning(Image.id, sort_by_parameter_order=True),
+                rows
+            ).all()
+            for path, row, image_id in zip(paths, rows, image_ids):
+                self.images[path] = (image_id, row["width"], row["height"])
+            add_images(self.db, self.job.dataset_id, len(rows))
+
+        self.job.processed_count += len(rows)
+        self.db.commit()
+        get_response_cache().invalidate(self.job.dataset_id)
+        if orphans:
+            storage_service.delete_many(orphans)
+
+    def pack_annotations(self, rows: List[Tuple[Tuple[int, int, int], dict]]) -> List[dict]:
+        """
+        Validate, clip and pack parsed (image, annotation) pairs into insert rows.
+
+        The chunk is encoded in one vectorized pass; if any geometry is
+        invalid, the rows are retried one by one so only the bad ones are
+        skipped.
+        """
+        items = [
+            (annotation["annotation_type"], annotation["geometry"], width, height)
+            for (_, width, height), annotation in rows
+        ]
+        try:
+            packed = encode_geometries(items)
+        except GeometryError:
+            packed = []
+            for item in items:
+                try:
+                    packed.append(encode_geometry(*item))
+                except GeometryError as e:
+                    print(f"Skipping annotation with invalid geometry: {e}")
+                    packed.append(None)
+
+        return [
+            {
+                "image_id": image_id,
+                "label": annotation["label"],
+                "annotation_type": annotation["annotation_type"],
+                "created_by": self.job.user_id,
+                **geometry
+            }
+            for ((image_id, _, _), annotation), geometry in zip(rows, packed)
+            if geometry is not None
+        ]
+
+    def import_annotations(self) -> None:
+        """
+        Attach the bundled COCO and YOLO annotations to the imported images, in bulk chunks.
+
+        Images are matched by their path inside the archive, so equal
+        filenames in different directories (train/ and val/) stay apart.
+        """
+        rows = []
+        paths_by_basename = index_by_basename(self.images)
+        for (directory, file_name), annotations in self.coco_annotations.items():
+            # file_name is relative to the annotation file or to the archive root
+            image = resolve_member(
+                [posixpath.normpath(posixpath.join(directory, file_name)), file_name],
+                file_name,
+                self.images,
+                paths_by_basename
+            )
+            if image:
+                rows.extend((image, annotation) for annotation in annotations)
+
+        if self.yolo_labels:
+            images_by_stem = {member_stem(path): image for path, image in self.images.items()}
+            stems_by_basename = index_by_basename(images_by_stem)
+            for path, text in self.yolo_labels.items():
+                image = resolve_member(
+                    yolo_image_stems(path),
+                    posixpath.basename(member_stem(path)),
+                    images_by_stem,
+                    stems_by_basename
+                )
+                if image:
+                    _, width, height = image
+                    rows.extend(
+                        (image, annotation)
+                        for annotation in parse_yolo_labels(text, self.class_names, width, height)
+                    )
+
+        for start in range(0, len(rows), ANNOTATION_BATCH_SIZE):
+            chunk = self.pack_annotations(rows[start:start + ANNOTATION_BATCH_SIZE])
+            if not chunk:
+                continue
+            annotation_ids = self.db.scalars(
+                insert(Annotation).returning(Annotation.id, sort_by_parameter_order=True),
+                chunk
+            ).all()
+            add_annotations(
+                self.db,
+                self.job.dataset_id,
+                [(row["image_id"], row["label"], row["annotation_type"]) for row in chunk]
+            )
+            record_changes(self.db, self.job.dataset_id, [
+                (annotation_id, row["image_id"], ChangeOperation.CREATE)
+                for row, annotation_id in zip(chunk, annotation_ids)
+            ])
+            self.db.commit()
+            get_response_cache().invalidate(self.job.dataset_id)
+
+
+@celery_app.task(name="ingest.import_archive")
+def import_archive_task(job_id: int, archive_key: str, fmt: str):
+    """
+    Import a ZIP or TAR archive from storage into the job's dataset.
+
+    The archive is deleted from storage when the task ends, whatever the
+    outcome, and any unexpected error marks the job FAILED.
+    """
+    db = SessionLocal()
+    fileobj = None
+    try:
+        job = db.query(IngestJob).filter(IngestJob.id == job_id).first()
+        if not job:
+            return
+
+        job.status = JobStatus.RUNNING
+        db.commit()
+
+        # ZIP needs random access to its central directory; TAR is read as a stream
+        if fmt == "zip":
+            fileobj = storage_service.open_seekable(archive_key)
+        else:
+            fileobj = storage_service.open_stream(archive_key)
+
+        if fileobj is None:
+            job.status = JobStatus.FAILED
+            job.error = "Archive not found in storage"
+            db.commit()
+            return
+
+        try:
+            ArchiveImport(db, job).run(fileobj, fmt)
+            job.status = JobStatus.COMPLETED
+        except (zipfile.BadZipFile, tarfile.TarError) as e:
+            db.rollback()
+            job.status = JobStatus.FAILED
+            job.error = f"Invalid archive: {e}"
+        except StorageUnavailableError:
+            db.rollback()
+            job.status = JobStatus.FAILED
+            job.error = "Storage unavailable"
+
+        db.commit()
+    except Exception as e:
+        # Never leave the job RUNNING: record the failure, then let Celery log it
+        db.rollback()
+        job = db.query(IngestJob).filter(IngestJob.id == job_id).first()
+        if job:
+            job.status = JobStatus.FAILED
+            job.error = f"Import failed: {e}"
+            db.commit()
+        raise
+    finally:
+        if fileobj is not None:
+            fileobj.close()
+        storage_service.delete_file(archive_key)
+        db.close()
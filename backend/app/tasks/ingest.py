@@ -0,0 +1,177 @@
+from typing import Optional, Set
+import hashlib
+
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.image import Image, ImageStatus
+from app.models.ingest_job import IngestJob, JobStatus
+from app.models.stored_object import StoredObject
+from app.services.storage import storage_service
+from app.services.image import process_image, needs_pyramid, generate_pyramid
+from app.services.content import content_key, tile_key
+from app.services.cache import get_response_cache
+
+
+class StorageUnavailableError(Exception):
+    """Raised when derived files cannot be written to object storage."""
+
+
+def record_job_progress(db, job_id: int, failed: bool = False) -> None:
+    """Atomically count one processed image against its job and close the job when done."""
+    counter = IngestJob.failed_count if failed else IngestJob.processed_count
+    db.query(IngestJob).filter(IngestJob.id == job_id).update(
+        {counter: counter + 1, IngestJob.status: JobStatus.RUNNING},
+        synchronize_session=False
+    )
+    db.query(IngestJob).filter(
+        IngestJob.id == job_id,
+        IngestJob.processed_count + IngestJob.failed_count >= IngestJob.total_count
+    ).update({IngestJob.status: JobStatus.COMPLETED}, synchronize_session=False)
+
+
+def upload_pyramid(image_data: bytes, tile_prefix: str) -> bool:
+    """Generate the tile pyramid for a large image and upload the tiles concurrently."""
+    return all(storage_service.upload_many(
+        (tile_data, tile_key(tile_prefix, level, column, row), "image/jpeg")
+        for level, column, row, tile_data in generate_pyramid(image_data)
+    ))
+
+
+def build_derivatives(image_data: bytes, content_hash: str) -> Optional[dict]:
+    """
+    Decode an original once and upload its thumbnail, plus tiles for large images.
+
+    Returns the derived column values shared by Image and StoredObject, or
+    None if the data is not a valid image. Raises StorageUnavailableError
+    when an upload fails.
+    """
+    processed = process_image(image_data)
+    if processed is None:
+        return None
+
+    thumbnail_key = content_key(content_hash, prefix="thumbnails")
+    if not storage_service.upload_file(processed.thumbnail, thumbnail_key, "image/jpeg"):
+        raise StorageUnavailableError(thumbnail_key)
+
+    derivatives = {
+        "thumbnail_key": thumbnail_key,
+        "width": processed.width,
+        "height": processed.height,
+        "tile_prefix": None,
+        "tile_size": None
+    }
+
+    if needs_pyramid(processed.width, processed.height):
+        tile_prefix = f"tiles/{content_hash[:2]}/{content_hash}"
+        if not upload_pyramid(image_data, tile_prefix):
+            raise StorageUnavailableError(tile_prefix)
+        derivatives["tile_prefix"] = tile_prefix
+        derivatives["tile_size"] = settings.TILE_SIZE
+
+    return derivatives
+
+
+def finish_images(db, images, stored: StoredObject = None, error: str = None) -> Set[int]:
+    """
+    Mark pending images ready from their stored object, or failed, and count them against their jobs.
+
+    Returns the ids of the datasets touched, whose cached responses are stale once this commits.
+    """
+    for image in images:
+        if stored is not None:
+            image.thumbnail_key = stored.thumbnail_key
+            image.width = stored.width
+            image.height = stored.height
+            image.tile_prefix = stored.tile_prefix
+            image.tile_size = stored.tile_size
+            image.status = ImageStatus.READY
+        else:
+            image.status = ImageStatus.FAILED
+            image.error = error
+
+        if image.ingest_job_id:
+            record_job_progress(db, image.ingest_job_id, failed=stored is None)
+
+    return {image.dataset_id for image in images}
+
+
+def pending_images(db, image: Image):
+    """The image plus every other pending image sharing its content."""
+    if not image.content_hash:
+        return [image]
+    return db.query(Image).filter(
+        Image.content_hash == image.content_hash,
+        Image.status == ImageStatus.PENDING
+    ).with_for_update().all()
+
+
+@celery_app.task(name="ingest.process_image", bind=True, max_retries=3, default_retry_delay=10)
+def process_image_task(self, image_id: int):
+    """
+    Generate the thumbnail and extract metadata for a pending image.
+
+    Identical uploads share one stored object, so the object is decoded at
+    most once and every pending image with the same content is completed.
+    """
+    db = SessionLocal()
+    try:
+        image = db.query(Image).filter(
+            Image.id == image_id,
+            Image.status == ImageStatus.PENDING
+        ).first()
+        if not image:
+            return
+
+        stored = None
+        if image.content_hash:
+            stored = db.query(StoredObject).filter(
+                StoredObject.content_hash == image.content_hash
+            ).first()
+            if stored is not None and stored.thumbnail_key:
+                # Already processed for an earlier upload of the same bytes
+                datasets = finish_images(db, pending_images(db, image), stored=stored)
+                db.commit()
+                get_response_cache().invalidate(*datasets)
+                return
+
+        image_data = storage_service.download_file(image.s3_key)
+        if image_data is None:
+            raise self.retry()
+
+        try:
+            derivatives = build_derivatives(
+                image_data,
+                image.content_hash or hashlib.sha256(image_data).hexdigest()
+            )
+        except StorageUnavailableError:
+            raise self.retry()
+
+        if derivatives is None:
+            datasets = finish_images(db, pending_images(db, image), error="Invalid image file")
+        elif stored is None:
+            for field, value in derivatives.items():
+                setattr(image, field, value)
+            image.status = ImageStatus.READY
+            if image.ingest_job_id:
+                record_job_progress(db, image.ingest_job_id)
+            datasets = {image.dataset_id}
+        else:
+            for field, value in derivatives.items():
+                setattr(stored, field, value)
+            datasets = finish_images(db, pending_images(db, image), stored=stored)
+
+        db.commit()
+        get_response_cache().invalidate(*datasets)
+    except self.MaxRetriesExceededError:
+        db.rollback()
+        image = db.query(Image).filter(
+            Image.id == image_id,
+            Image.status == ImageStatus.PENDING
+        ).first()
+        if image:
+            datasets = finish_images(db, pending_images(db, image), error="Storage unavailable")
+            db.commit()
+            get_response_cache().invalidate(*datasets)
+    finally:
+        db.close()
@@ -0,0 +1,60 @@
+"""Validation and change tracking of annotation saves."""
+from sqlalchemy import text
+
+from app.core.database import engine
+
+
+def test_bulk_save_rejects_repeated_annotation_id(client, auth_headers, seeded):
+    image_id = seeded["image_id"]
+    with engine.connect() as connection:
+        annotation_id = connection.execute(
+            text("SELECT min(id) FROM annotations WHERE image_id = :image_id"), {"image_id": image_id}
+        ).scalar_one()
+
+    item = {
+        "id": annotation_id,
+        "label": "car",
+        "annotation_type": "bbox",
+        "geometry": {"x": 1, "y": 1, "width": 10, "height": 10},
+    }
+    response = client.post(
+        "/api/annotations/annotations/bulk",
+        json={"images": [{"image_id": image_id, "annotations": [item, {**item, "label": "dog"}]}]},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 400
+    assert str(annotation_id) in response.json()["detail"]
+
+
+def test_update_records_only_real_changes(client, auth_headers, seeded):
+    with engine.connect() as connection:
+        annotation_id, label, dataset_id = connection.execute(
+            text(
+                "SELECT a.id, a.label, i.dataset_id FROM annotations a JOIN images i ON i.id = a.image_id "
+                "WHERE a.image_id = :image_id ORDER BY a.id DESC LIMIT 1"
+            ),
+            {"image_id": seeded["image_id"]},
+        ).one()
+
+    def revision():
+        with engine.connect() as connection:
+            return connection.execute(
+                text("SELECT revision FROM datasets WHERE id = :id"), {"id": dataset_id}
+            ).scalar_one()
+
+    url = f"/api/annotations/annotations/{annotation_id}"
+    geometry = client.get(f"/api/annotations/images/{seeded['image_id']}/annotations", headers=auth_headers).json()
+    geometry = next(item["geometry"] for item in geometry if item["id"] == annotation_id)
+    before = revision()
+
+    for body in ({}, {"label": label}, {"label": label, "geometry": geometry}):
+        response = client.put(url, json=body, headers=auth_headers)
+        assert response.status_code == 200
+        assert revision() == before
+
+    response = client.put(url, json={"label": f"{label}-renamed"}, headers=auth_headers)
+    assert response.json()["label"] == f"{label}-renamed"
+    assert revision() == before + 1
+
+    client.put(url, json={"label": label}, headers=auth_headers)
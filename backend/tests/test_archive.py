@@ -0,0 +1,125 @@
+"""Parsing, member matching and ingestion of imported archives."""
+import hashlib
+import io
+import zipfile
+
+import pytest
+from PIL import Image as PILImage
+
+from app.core.database import SessionLocal
+from app.models.image import Image
+from app.models.ingest_job import IngestJob, JobStatus
+from app.models.stored_object import StoredObject
+from app.services.content import content_key
+from app.tasks.archive import ArchiveImport
+
+from app.services.archive import (
+    index_by_basename,
+    is_yolo_labels,
+    member_stem,
+    parse_yolo_classes,
+    parse_yolo_labels,
+    resolve_member,
+    yolo_image_stems,
+)
+
+
+def test_yolo_labels_skip_lines_with_infinite_class_id():
+    annotations = parse_yolo_labels("inf 0.5 0.5 0.1 0.1\n1 0.5 0.5 0.2 0.2\n", ["car", "dog"], 100, 100)
+    assert [annotation["label"] for annotation in annotations] == ["dog"]
+
+
+def test_yolo_classes_must_be_utf8():
+    with pytest.raises(UnicodeDecodeError):
+        parse_yolo_classes("caf\xe9\n".encode("latin-1"))
+
+
+def test_same_filename_in_different_directories_stays_apart():
+    images = {"train/a.jpg": 1, "val/a.jpg": 2, "val/b.jpg": 3}
+    by_basename = index_by_basename(images)
+
+    assert resolve_member(["val/a.jpg"], "a.jpg", images, by_basename) == 2
+    assert resolve_member(["annotations/b.jpg"], "b.jpg", images, by_basename) == 3
+    # Ambiguous references are dropped rather than attached to the wrong image
+    assert resolve_member(["annotations/a.jpg"], "a.jpg", images, by_basename) is None
+
+
+@pytest.mark.parametrize("label, image", [
+    ("train/a.txt", "train/a.jpg"),
+    ("labels/train/a.txt", "images/train/a.jpg"),
+    ("data/labels/val/a.txt", "data/images/val/a.jpg"),
+])
+def test_yolo_labels_pair_with_their_image(label, image):
+    stems = {member_stem(path): path for path in ("train/a.jpg", "images/train/a.jpg", "data/images/val/a.jpg")}
+    assert resolve_member(yolo_image_stems(label), "a", stems, index_by_basename(stems)) == image
+
+
+def jpeg_bytes(color) -> bytes:
+    output = io.BytesIO()
+    PILImage.new("RGB", (32, 24), color).save(output, format="JPEG")
+    return output.getvalue()
+
+
+@pytest.fixture
+def archive_job(seeded):
+    db = SessionLocal()
+    job = IngestJob(
+        dataset_id=seeded["dataset_ids"][-1], user_id=seeded["owner_id"],
+        status=JobStatus.RUNNING, total_count=0, processed_count=0, failed_count=0
+    )
+    db.add(job)
+    db.commit()
+    yield db, job
+    db.close()
+
+
+def test_archive_completes_a_pending_object_without_copying_it(archive_job):
+    db, job = archive_job
+    data = jpeg_bytes("red")
+    content_hash = hashlib.sha256(data).hexdigest()
+    s3_key = content_key(content_hash, extension="jpg")
+    db.add(StoredObject(content_hash=content_hash, s3_key=s3_key, size=len(data), ref_count=1))
+    db.commit()
+
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("photos/red.jpeg", data)
+    archive.seek(0)
+    ArchiveImport(db, job).run(archive, "zip")
+
+    stored = db.get(StoredObject, content_hash)
+    db.refresh(stored)
+    image = db.query(Image).filter(Image.ingest_job_id == job.id).one()
+    # The member's .jpeg extension must not create a second original
+    assert image.s3_key == s3_key
+    assert stored.ref_count == 2
+    assert stored.thumbnail_key == image.thumbnail_key is not None
+    assert (stored.width, stored.height) == (32, 24)
+
+
+def test_archive_keeps_only_label_text_files(archive_job):
+    db, job = archive_job
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("README.txt", "Photos of the parking lot\n0 1 2 3 4\n")
+        zf.writestr("notes/todo.txt", "relabel the trucks\n")
+        zf.writestr("labels/train/a.txt", "")
+        zf.writestr("flat/b.txt", "0 0.5 0.5 0.1 0.1\n")
+    archive.seek(0)
+
+    importer = ArchiveImport(db, job)
+    importer.run(archive, "zip")
+
+    assert set(importer.yolo_labels) == {"labels/train/a.txt", "flat/b.txt"}
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("0 0.5 0.5 0.1 0.1\n", True),
+    ("\n3 0.1 0.1 0.2 0.2 0.3 0.1\n", True),
+    ("0 0.5 0.5\n", False),
+    ("Photos of the parking lot\n", False),
+    ("0 inf 0.5 0.1 0.1\n", False),
+    ("", False),
+])
+def test_is_yolo_labels(text, expected):
+    assert is_yolo_labels(text) is expected
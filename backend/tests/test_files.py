@@ -0,0 +1,39 @@
+"""Signed downloads of locally stored files."""
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services.storage import get_storage_service, sign_file_url
+
+KEY = "images/ab/abc.jpg"
+
+
+@pytest.fixture
+def signed_url():
+    assert get_storage_service().upload_file(b"jpeg bytes", KEY)
+    expires = int(time.time()) + 60
+    return f"/api/files/{KEY}?expires={expires}&signature={sign_file_url(KEY, expires)}"
+
+
+def test_download_streams_file_from_app(client, signed_url):
+    response = client.get(signed_url)
+
+    assert response.status_code == 200
+    assert response.content == b"jpeg bytes"
+    assert "x-accel-redirect" not in response.headers
+
+
+def test_download_hands_file_to_nginx(client, signed_url, monkeypatch):
+    monkeypatch.setattr(settings, "LOCAL_STORAGE_ACCEL_PREFIX", "/protected-files/")
+    response = client.get(signed_url)
+
+    assert response.status_code == 200
+    assert response.content == b""
+    assert response.headers["x-accel-redirect"] == f"/protected-files/{KEY}"
+    assert response.headers["content-type"] == "image/jpeg"
+
+
+def test_download_rejects_bad_signature(client, signed_url):
+    tampered = signed_url[:-1] + ("1" if signed_url.endswith("0") else "0")
+    assert client.get(tampered).status_code == 403
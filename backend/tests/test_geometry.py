@@ -0,0 +1,46 @@
+"""Validation of annotation geometry before it is packed."""
+import pytest
+
+from app.models.annotation import AnnotationType
+from app.services.geometry import GeometryError, encode_geometries, encode_geometry
+
+BOX = {"x": 10, "y": 10, "width": 20, "height": 20}
+TRIANGLE = {"points": [[0, 0], [10, 0], [10, 10]]}
+
+
+@pytest.mark.parametrize("value", ["12", True, None, [1]])
+def test_box_coordinates_must_be_numbers(value):
+    with pytest.raises(GeometryError, match="numeric"):
+        encode_geometry(AnnotationType.BBOX, {**BOX, "width": value})
+
+
+@pytest.mark.parametrize("value", ["12", False, None])
+def test_polygon_coordinates_must_be_numbers(value):
+    with pytest.raises(GeometryError, match="numeric"):
+        encode_geometry(AnnotationType.POLYGON, {"points": [[0, 0], [10, value], [10, 10]]})
+
+
+def test_error_names_the_offending_annotation():
+    items = [
+        (AnnotationType.BBOX, BOX, 100, 100),
+        (AnnotationType.POLYGON, TRIANGLE, 100, 100),
+        (AnnotationType.BBOX, BOX, 100, 100),
+        (AnnotationType.BBOX, {**BOX, "x": "10"}, 100, 100),
+    ]
+    with pytest.raises(GeometryError, match="^Annotation 3: "):
+        encode_geometries(items)
+
+
+def test_valid_shapes_are_clipped_to_the_image():
+    box, polygon = encode_geometries([
+        (AnnotationType.BBOX, {"x": 90, "y": 90, "width": 20, "height": 20}, 100, 100),
+        (AnnotationType.POLYGON, {"points": [[0, 0], [150, 0], [150, 150]]}, 100, 100),
+    ])
+    assert box["coordinates"] == [90, 90, 10, 10]
+    assert (polygon["max_x"], polygon["max_y"]) == (100, 100)
+
+
+@pytest.mark.parametrize("points", [[], [[0, 0], [10, 0]], [[0, 0], [10, 0], [10]], [[0, 0, 0]] * 3])
+def test_polygon_needs_three_points(points):
+    with pytest.raises(GeometryError, match="at least 3"):
+        encode_geometry(AnnotationType.POLYGON, {"points": points})
@@ -0,0 +1,52 @@
+"""
+Index choice of the image listing and search queries.
+
+Each filter of the search endpoint has an index of its own; these tests
+EXPLAIN the query a request runs and check that the planner picks it.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from tests.conftest import plan_nodes, request_plans
+
+
+def used_indexes(plans) -> set:
+    return {node["Index Name"] for _, plan in plans for node in plan_nodes(plan) if "Index Name" in node}
+
+
+def image_query_plans(client, url, headers):
+    """Plans of the statements that read the images table."""
+    return [(statement, plan) for statement, plan in request_plans(client, url, headers) if "FROM images" in statement]
+
+
+def test_list_uses_dataset_id_index(client, auth_headers, seeded):
+    plans = image_query_plans(client, f"/api/images/datasets/{seeded['dataset_id']}/images", auth_headers)
+    assert "ix_images_dataset_id_id" in used_indexes(plans)
+
+
+def test_list_page_after_cursor_uses_dataset_id_index(client, auth_headers, seeded):
+    url = f"/api/images/datasets/{seeded['dataset_id']}/images?limit=10"
+    cursor = client.get(url, headers=auth_headers).json()["next_cursor"]
+
+    plans = image_query_plans(client, f"{url}&cursor={cursor}", auth_headers)
+    assert "ix_images_dataset_id_id" in used_indexes(plans)
+
+
+@pytest.mark.parametrize("query, index", [
+    # Status has no index of its own: common statuses walk the dataset in id order
+    ("status=ready", "ix_images_dataset_id_id"),
+    ("annotated=false", "ix_images_dataset_id_unannotated"),
+    ("label=car", "ix_annotations_image_id_label"),
+    ("min_width=4000", "ix_images_dataset_id_width"),
+    ("min_height=4000", "ix_images_dataset_id_height"),
+])
+def test_search_uses_filter_index(client, auth_headers, seeded, query, index):
+    url = f"/api/images/datasets/{seeded['dataset_id']}/images/search?{query}"
+    assert index in used_indexes(image_query_plans(client, url, auth_headers))
+
+
+def test_search_created_range_uses_created_at_index(client, auth_headers, seeded):
+    created_after = (datetime.utcnow() - timedelta(days=5)).isoformat()
+    url = f"/api/images/datasets/{seeded['dataset_id']}/images/search?created_after={created_after}"
+    assert "ix_images_dataset_id_created_at" in used_indexes(image_query_plans(client, url, auth_headers))
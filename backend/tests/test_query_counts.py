@@ -0,0 +1,34 @@
+"""
+Statement counts of the list endpoints.
+
+A page must cost the same number of queries whatever its size: counts
+and other per-row data are aggregated in the page query, never fetched
+one row at a time.
+"""
+import pytest
+
+from tests.conftest import record_queries
+
+PAGE_SIZES = (1, 10, 100)
+
+
+def statement_counts(client, url, headers) -> dict:
+    """Number of statements a request runs, for each page size."""
+    counts = {}
+    for limit in PAGE_SIZES:
+        with record_queries() as queries:
+            response = client.get(url, params={"limit": limit}, headers=headers)
+        assert response.status_code == 200, response.text
+        assert len(response.json()["items"]) == limit
+        counts[limit] = len(queries)
+    return counts
+
+
+@pytest.mark.parametrize("path", [
+    "/api/datasets/",
+    "/api/images/datasets/{dataset_id}/images",
+    "/api/images/datasets/{dataset_id}/images/search",
+])
+def test_list_statement_count_is_constant(client, auth_headers, seeded, path):
+    counts = statement_counts(client, path.format(dataset_id=seeded["dataset_id"]), auth_headers)
+    assert len(set(counts.values())) == 1, counts
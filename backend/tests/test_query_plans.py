@@ -0,0 +1,65 @@
+"""
+Query plans of the hot read paths.
+
+Each test makes a real request against the seeded database, EXPLAINs every
+SELECT it issued and fails if any of them reads images or annotations with
+a sequential scan.
+"""
+import pytest
+
+from tests.conftest import LARGE_TABLES, plan_nodes, request_plans
+
+
+def sequential_scans(plan: dict) -> list:
+    return [
+        node["Relation Name"] for node in plan_nodes(plan)
+        if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in LARGE_TABLES
+    ]
+
+
+def assert_no_sequential_scans(plans):
+    assert plans, "the request ran no queries"
+    for statement, plan in plans:
+        assert not sequential_scans(plan), f"sequential scan of {sequential_scans(plan)} in:\n{statement}"
+
+
+@pytest.mark.parametrize("query", [
+    "",
+    "?limit=100",
+    "?skip=50&limit=10",
+])
+def test_image_list(client, auth_headers, seeded, query):
+    url = f"/api/images/datasets/{seeded['dataset_id']}/images{query}"
+    assert_no_sequential_scans(request_plans(client, url, auth_headers))
+
+
+@pytest.mark.parametrize("query", [
+    "label=car",
+    "label=car&annotated=true",
+    "annotated=false",
+    "status=pending",
+    "min_width=4000",
+    "max_height=500",
+    "created_after=2026-01-01T00:00:00",
+])
+def test_image_search(client, auth_headers, seeded, query):
+    url = f"/api/images/datasets/{seeded['dataset_id']}/images/search?{query}"
+    assert_no_sequential_scans(request_plans(client, url, auth_headers))
+
+
+@pytest.mark.parametrize("query", [
+    "x=0&y=0&width=100&height=100",
+    "x=0&y=0&width=100&height=100&label=car",
+])
+def test_annotation_region(client, auth_headers, seeded, query):
+    url = f"/api/annotations/images/{seeded['image_id']}/annotations/region?{query}"
+    assert_no_sequential_scans(request_plans(client, url, auth_headers))
+
+
+@pytest.mark.parametrize("query", [
+    "since=0",
+    "since=100&limit=50",
+])
+def test_dataset_changes(client, auth_headers, seeded, query):
+    url = f"/api/datasets/{seeded['dataset_id']}/changes?{query}"
+    assert_no_sequential_scans(request_plans(client, url, auth_headers))
@@ -0,0 +1,87 @@
+"""Image uploads: bulk inserts and one dispatch per stored object."""
+import os
+
+import pytest
+from sqlalchemy import text
+
+import app.api.images as images_api
+from app.core.database import engine
+from tests.conftest import record_queries
+
+
+class RecordedGroup:
+    """Stands in for celery.group, collecting the dispatched signatures instead of sending them."""
+    dispatched = []
+
+    def __init__(self, signatures):
+        self.signatures = list(signatures)
+
+    def apply_async(self):
+        RecordedGroup.dispatched.append([signature.args for signature in self.signatures])
+
+
+@pytest.fixture
+def dispatched(monkeypatch):
+    RecordedGroup.dispatched = []
+    monkeypatch.setattr(images_api, "group", RecordedGroup)
+    return RecordedGroup.dispatched
+
+
+def upload(client, headers, dataset_id, contents):
+    files = [("files", (f"upload-{i}.jpg", data, "image/jpeg")) for i, data in enumerate(contents)]
+    with record_queries() as queries:
+        response = client.post(f"/api/images/datasets/{dataset_id}/images", files=files, headers=headers)
+    assert response.status_code == 202, response.text
+    return response.json(), queries
+
+
+def test_upload_dispatches_each_new_object_once(client, auth_headers, seeded, dispatched):
+    first, second = os.urandom(256), os.urandom(256)
+    images, _ = upload(client, auth_headers, seeded["dataset_ids"][-1], [first, second, first])
+
+    assert [image["status"] for image in images] == ["pending"] * 3
+    assert len({image["ingest_job_id"] for image in images}) == 1
+    # Identical bytes share one object, so only two images are processed
+    assert dispatched == [[(images[0]["id"],), (images[1]["id"],)]]
+
+
+def test_upload_statement_count_does_not_grow_with_files(client, auth_headers, seeded, dispatched):
+    dataset_id = seeded["dataset_ids"][-1]
+    _, few = upload(client, auth_headers, dataset_id, [os.urandom(64) for _ in range(2)])
+    _, many = upload(client, auth_headers, dataset_id, [os.urandom(64) for _ in range(20)])
+
+    image_statements = [statement for statement, _ in many if "images" in statement]
+    assert len(many) - len(few) == 18  # One stored object upsert per distinct file
+    assert len(image_statements) == len([statement for statement, _ in few if "images" in statement])
+
+
+def test_upload_stores_again_an_object_released_meanwhile(client, auth_headers, seeded, dispatched, monkeypatch):
+    dataset_id = seeded["dataset_ids"][-1]
+    data = os.urandom(256)
+    (original,), _ = upload(client, auth_headers, dataset_id, [data])
+
+    save_uploads = images_api.save_uploads
+    calls = []
+
+    def release_then_save(db, *args):
+        # A concurrent delete releases the object after upload_images looked it up
+        if not calls:
+            with engine.begin() as connection:
+                connection.execute(
+                    text("DELETE FROM stored_objects WHERE content_hash = :hash"), {"hash": original["content_hash"]}
+                )
+        calls.append(args)
+        return save_uploads(db, *args)
+
+    monkeypatch.setattr(images_api, "save_uploads", release_then_save)
+    (image,), _ = upload(client, auth_headers, dataset_id, [data])
+
+    assert len(calls) == 2
+    assert image["status"] == "pending"
+    assert image["s3_key"] != original["s3_key"]
+    with engine.connect() as connection:
+        stored = connection.execute(
+            text("SELECT s3_key, ref_count FROM stored_objects WHERE content_hash = :hash"),
+            {"hash": original["content_hash"]}
+        ).one()
+    assert tuple(stored) == (image["s3_key"], 1)
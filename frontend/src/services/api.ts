@@ -7,6 +7,10 @@ import type {
   LoginCredentials,
   RegisterData,
   TokenResponse,
+  Page,
+  AnnotationOverlap,
+  ExportJob,
+  ExportFormat,
 } from '../types';
 
 class API {
@@ -92,8 +96,8 @@ class API {
 
   // Datasets
   async getDatasets(): Promise<Dataset[]> {
-    const response = await this.client.get<Dataset[]>('/datasets/');
-    return response.data;
+    const response = await this.client.get<Page<Dataset>>('/datasets/');
+    return response.data.items;
   }
 
   async createDataset(data: { name: string; description?: string }): Promise<Dataset> {
@@ -117,8 +121,8 @@ class API {
 
   // Images
   async getDatasetImages(datasetId: number): Promise<Image[]> {
-    const response = await this.client.get<Image[]>(`/datasets/${datasetId}/images`);
-    return response.data;
+    const response = await this.client.get<Page<Image>>(`/datasets/${datasetId}/images`);
+    return response.data.items;
   }
 
   async uploadImages(datasetId: number, files: File[]): Promise<Image[]> {
@@ -155,12 +159,74 @@ class API {
     await this.client.delete(`/images/${id}`);
   }
 
+  // Exports
+  async createExport(
+    datasetId: number,
+    format: ExportFormat = 'coco',
+    includeImages: boolean = true
+  ): Promise<ExportJob> {
+    const response = await this.client.post<ExportJob>(`/datasets/${datasetId}/exports`, {
+      format,
+      include_images: includeImages,
+    });
+    return response.data;
+  }
+
+  async getExport(id: number): Promise<ExportJob> {
+    const response = await this.client.get<ExportJob>(`/exports/${id}`);
+    return response.data;
+  }
+
+  async getExportUrl(id: number): Promise<{ url: string }> {
+    const response = await this.client.get<{ url: string }>(`/exports/${id}/download`);
+    return response.data;
+  }
+
+  async downloadExport(datasetId: number, format: ExportFormat, includeImages: boolean = true): Promise<Blob> {
+    const response = await this.client.get<Blob>(`/annotations/datasets/${datasetId}/export/${format}`, {
+      params: { include_images: includeImages },
+      responseType: 'blob',
+    });
+    return response.data;
+  }
+
   // Annotations
   async getImageAnnotations(imageId: number): Promise<Annotation[]> {
     const response = await this.client.get<Annotation[]>(`/images/${imageId}/annotations`);
     return response.data;
   }
 
+  async getAnnotationsInRegion(
+    imageId: number,
+    region: { x: number; y: number; width?: number; height?: number; label?: string }
+  ): Promise<Annotation[]> {
+    const response = await this.client.get<Annotation[]>(`/annotations/images/${imageId}/annotations/region`, {
+      params: region,
+    });
+    return response.data;
+  }
+
+  async getImageOverlaps(
+    imageId: number,
+    params: { min_iou?: number; same_label?: boolean } = {}
+  ): Promise<AnnotationOverlap[]> {
+    const response = await this.client.get<AnnotationOverlap[]>(`/annotations/images/${imageId}/annotations/overlaps`, {
+      params,
+    });
+    return response.data;
+  }
+
+  async getDatasetOverlaps(
+    datasetId: number,
+    params: { min_iou?: number; same_label?: boolean; limit?: number; cursor?: string } = {}
+  ): Promise<Page<AnnotationOverlap>> {
+    const response = await this.client.get<Page<AnnotationOverlap>>(
+      `/annotations/datasets/${datasetId}/annotations/overlaps`,
+      { params }
+    );
+    return response.data;
+  }
+
   async createAnnotation(data: {
     image_id: number;
     label: string;
@@ -182,6 +248,21 @@ class API {
   async deleteAnnotation(id: number): Promise<void> {
     await this.client.delete(`/annotations/${id}`);
   }
+
+  async saveAnnotations(
+    images: {
+      image_id: number;
+      annotations: { id?: number; label: string; annotation_type: string; geometry: any }[];
+      deleted_ids?: number[];
+      replace?: boolean;
+    }[]
+  ): Promise<{ image_id: number; annotations: Annotation[] }[]> {
+    const response = await this.client.post<{ image_id: number; annotations: Annotation[] }[]>(
+      '/annotations/annotations/bulk',
+      { images }
+    );
+    return response.data;
+  }
 }
 
 export const api = new API();
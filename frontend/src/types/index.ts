@@ -27,6 +27,10 @@ export interface Image {
   thumbnail_key?: string;
   width?: number;
   height?: number;
+  tile_size?: number;
+  status: 'pending' | 'ready' | 'failed';
+  error?: string;
+  ingest_job_id?: number;
   created_at: string;
   updated_at: string;
   annotation_count?: number;
@@ -77,3 +81,31 @@ export interface TokenResponse {
   refresh_token: string;
   token_type: string;
 }
+
+export interface Page<T> {
+  items: T[];
+  next_cursor?: string | null;
+}
+
+export type ExportFormat = 'coco' | 'yolo' | 'voc';
+
+export interface ExportJob {
+  id: number;
+  dataset_id: number;
+  format: ExportFormat;
+  status: 'pending' | 'running' | 'completed' | 'failed';
+  image_count: number;
+  annotation_count: number;
+  size?: number | null;
+  rows_per_second?: number | null;
+  error?: string | null;
+  created_at: string;
+  updated_at: string;
+}
+
+export interface AnnotationOverlap {
+  image_id: number;
+  annotation_id: number;
+  other_id: number;
+  iou: number;
+}